@@ -0,0 +1,109 @@
+"""Concurrent throughput of a blocking (sync Session) handler vs the async service layer.
+
+The sync handler is a plain ``def`` route, as the routes were before the
+async move: FastAPI runs it (and ``get_db``) in its threadpool, so
+concurrency is capped by the threadpool and the 5+10 QueuePool. The async
+handler is an ``async def`` route on the async engine. A fixed per-statement
+latency is injected on the driver side to stand in for a slow database: a
+blocking sleep for the sync engine, an awaited one for the async engine (its
+events fire on the event loop, where a blocking sleep would serialize every
+request).
+
+(A blocking query inside an ``async def`` route is not measured: it holds the
+event loop, ``get_db`` teardown never runs, and the pool times out.)
+
+Usage:
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 50 --latency-ms 5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import configure
+
+# Settings are read at import time; an exported DATABASE_URL still wins
+configure(os.environ.get("DATABASE_URL"))
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.util import await_only  # noqa: E402
+
+from database import SessionLocal, async_engine, create_db_and_tables, engine, get_db  # noqa: E402
+from models.users_models import User  # noqa: E402
+from services.users_services import UserService, get_user_service  # noqa: E402
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/{email}")
+    def sync_lookup(email: str, db: Session = Depends(get_db)):
+        user = db.query(User).filter(User.email == email).first()
+        return {"id": str(user.id)}
+
+    @app.get("/async/{email}")
+    async def async_lookup(email: str, user_service: UserService = Depends(get_user_service)):
+        user = await user_service.get_user_by_email(email)
+        return {"id": str(user.id)}
+
+    return app
+
+
+def seed(users: int) -> list[str]:
+    create_db_and_tables()
+    emails = [f"bench-{i}@example.com" for i in range(users)]
+    with SessionLocal() as db:
+        db.add_all(User(email=email) for email in emails)
+        db.commit()
+    return emails
+
+
+def inject_latency(latency_ms: float) -> None:
+    if latency_ms <= 0:
+        return
+
+    def _sleep(*_):
+        time.sleep(latency_ms / 1000)
+
+    # Async engine events run on the event loop (inside its greenlet): wait without blocking it
+    def _async_sleep(*_):
+        await_only(asyncio.sleep(latency_ms / 1000))
+
+    event.listen(engine, "before_cursor_execute", _sleep)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _async_sleep)
+
+
+async def run(client: httpx.AsyncClient, prefix: str, emails: list[str], requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            response = await client.get(f"/{prefix}/{emails[i % len(emails)]}")
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args) -> None:
+    emails = seed(args.users)
+    inject_latency(args.latency_ms)
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for prefix in ("sync", "async"):
+            await run(client, prefix, emails, min(args.requests, 20), args.concurrency)  # warm-up
+            rps = await run(client, prefix, emails, args.requests, args.concurrency)
+            print(f"{prefix:>5}: {rps:8.1f} req/s  (concurrency={args.concurrency}, latency={args.latency_ms}ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""Sign/verify cost per JWT algorithm, with pre-parsed keys vs PEM parsed per call.
+
+Usage:
+    python -m benchmarks.bench_jwt_algorithms --number 5000
+"""
+import argparse
+import timeit
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from benchmarks.common import configure
+
+
+def _pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def _public_pem(private_key) -> bytes:
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+def main(number: int, repeat: int) -> None:
+    from services.key_ring import KeyRing, SigningKey
+
+    es256 = ec.generate_private_key(ec.SECP256R1())
+    eddsa = ed25519.Ed25519PrivateKey.generate()
+    keys = [
+        SigningKey.from_secret("hs256", "benchmark-secret-key-change-me-0123456789", "HS256"),
+        SigningKey.from_private_key("es256", es256, "ES256"),
+        SigningKey.from_private_key("eddsa", eddsa, "EdDSA"),
+    ]
+    pems = {"es256": (_pem(es256), _public_pem(es256)), "eddsa": (_pem(eddsa), _public_pem(eddsa))}
+    payload = {"sub": "bench@example.com", "type": "access"}
+
+    def bench(fn) -> float:
+        return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+    print(f"{'algorithm':<8} {'sign (ring)':>12} {'verify (ring)':>14} {'sign (pem)':>12} {'verify (pem)':>13}   us/op")
+    for key in keys:
+        ring = KeyRing([key])
+        token = ring.encode(payload)
+        row = [bench(lambda: ring.encode(payload)), bench(lambda: ring.decode(token))]
+        if key.kid in pems:
+            private_pem, public_pem = pems[key.kid]
+            row += [
+                bench(lambda: jwt.encode(payload, private_pem, algorithm=key.algorithm)),
+                bench(lambda: jwt.decode(token, public_pem, algorithms=[key.algorithm])),
+            ]
+        cells = " ".join(f"{value:>12.2f}" for value in row)
+        print(f"{key.algorithm:<8} {cells}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    configure()
+    main(args.number, args.repeat)
@@ -0,0 +1,88 @@
+"""User-by-phone lookup: correlated EXISTS (``User.phones.any``) vs index-driven join.
+
+Seeds ``--rows`` users with one phone each (default one million) and times
+both query shapes, printing the SQLite query plan for each.
+
+Usage:
+    python -m benchmarks.bench_phone_lookup --rows 1000000 --lookups 2000
+"""
+import argparse
+import random
+import time
+import uuid
+
+from benchmarks.common import configure
+
+
+def seed(rows: int, batch: int = 50_000) -> None:
+    from sqlalchemy import func, insert, select
+
+    from database import SessionLocal, create_db_and_tables
+    from models.users_models import User, UserPhone
+
+    create_db_and_tables()
+    with SessionLocal() as db:
+        existing = db.execute(select(func.count()).select_from(UserPhone)).scalar_one()
+        for start in range(existing, rows, batch):
+            users, phones = [], []
+            for i in range(start, min(start + batch, rows)):
+                user_id = uuid.uuid4()
+                users.append({"id": user_id, "email": f"phone-bench-{i}@example.com"})
+                phones.append({"id": uuid.uuid4(), "user_id": user_id, "phone": f"+1555{i:07d}", "is_verified": True})
+            db.execute(insert(User), users)
+            db.execute(insert(UserPhone), phones)
+            db.commit()
+            print(f"seeded {min(start + batch, rows)}/{rows}", end="\r")
+    print()
+
+
+def main(args) -> None:
+    from sqlalchemy import select, text
+    from sqlalchemy.orm import joinedload, selectinload
+
+    from database import SessionLocal, engine
+    from models.users_models import User, UserPhone
+
+    seed(args.rows)
+    numbers = [f"+1555{random.randrange(args.rows):07d}" for _ in range(args.lookups)]
+
+    def exists_query(phone):
+        return (
+            select(User)
+            .where(User.phones.any(UserPhone.phone == phone))
+            .options(selectinload(User.social_accounts))
+        )
+
+    def join_query(phone):
+        return (
+            select(User)
+            .join(UserPhone, UserPhone.user_id == User.id)
+            .where(UserPhone.phone == phone)
+            .options(joinedload(User.phones), joinedload(User.social_accounts))
+        )
+
+    for name, build in (("exists (before)", exists_query), ("join (after)", join_query)):
+        if engine.dialect.name == "sqlite":
+            compiled = build(numbers[0]).compile(engine, compile_kwargs={"literal_binds": True})
+            with engine.connect() as conn:
+                plan = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+            print(f"{name} plan: " + " | ".join(row[-1] for row in plan))
+
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            for phone in numbers:
+                user = db.execute(build(phone)).unique().scalars().first()
+                assert user is not None
+                db.expunge_all()
+            elapsed = time.perf_counter() - started
+        print(f"{name:<16} {elapsed / len(numbers) * 1e6:10.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    configure(args.database_url)
+    main(args)
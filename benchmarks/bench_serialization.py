@@ -0,0 +1,111 @@
+"""Serialization cost per ``GET /users/`` page (``list[UserResponse]``), without the database or HTTP stack.
+
+Builds ``--users`` transient ``User`` objects (each with one Google social
+account) and times how each encoding path turns a page of them into bytes:
+
+- ``jsonable_encoder + JSONResponse``: the path routes without a
+  ``response_model`` took (stdlib ``json.dumps``)
+- ``response_model + JSONResponse``: FastAPI's compiled response field, stdlib ``json``
+- ``response_model + ORJSONResponse``: compiled response field, orjson (app default)
+- ``TypeAdapter.dump_json``: pydantic-core straight to bytes, the lower bound
+
+Usage:
+    python -m benchmarks.bench_serialization --users 50 --iterations 2000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from benchmarks.common import configure
+
+
+def build_users(count: int):
+    from models.users_models import AuthProviderType, User, UserSocialAccount
+
+    now = datetime.now(timezone.utc)
+    users = []
+    for i in range(count):
+        user = User(
+            id=uuid.uuid4(),
+            email=f"serialize-{i}@example.com",
+            full_name=f"Serialize User {i}",
+            given_name="Serialize",
+            family_name=f"User {i}",
+            disabled=False,
+            picture="https://example.com/avatar.png",
+            created_at=now,
+            updated_at=now,
+        )
+        user.social_accounts = [
+            UserSocialAccount(
+                user_id=user.id,
+                provider=AuthProviderType.GOOGLE,
+                provider_id=f"google-{i}",
+                is_verified=True,
+                email=user.email,
+            )
+        ]
+        users.append(user)
+    return users
+
+
+async def main(args) -> None:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from pydantic import TypeAdapter
+
+    from schemas.users_schemas import UserResponse
+
+    users = build_users(args.users)
+    page = list[UserResponse]
+    field = create_response_field(name="Response_bench", type_=page, mode="serialization")
+    adapter = TypeAdapter(page)
+
+    async def legacy():
+        # What the route did before: ORM objects -> jsonable_encoder -> json.dumps
+        return JSONResponse(jsonable_encoder([UserResponse.model_validate(user) for user in users])).body
+
+    async def response_model_json():
+        content = await serialize_response(field=field, response_content=users)
+        return JSONResponse(content).body
+
+    async def response_model_orjson():
+        content = await serialize_response(field=field, response_content=users)
+        return ORJSONResponse(content).body
+
+    async def type_adapter():
+        return adapter.dump_json(adapter.validate_python(users))
+
+    paths = (
+        ("jsonable_encoder + JSONResponse", legacy),
+        ("response_model + JSONResponse", response_model_json),
+        ("response_model + ORJSONResponse", response_model_orjson),
+        ("TypeAdapter.dump_json", type_adapter),
+    )
+    baseline = None
+    for name, render in paths:
+        for _ in range(min(args.iterations, 50)):
+            await render()
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            body = await render()
+        per_response = (time.perf_counter() - started) / args.iterations
+        baseline = baseline or per_response
+        print(
+            f"{name:<34} {per_response * 1e6:9.1f} us/response "
+            f"{per_response / args.users * 1e6:7.2f} us/user "
+            f"{baseline / per_response:5.2f}x  ({len(body)} bytes)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="users per page")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    configure()
+    asyncio.run(main(args))
@@ -0,0 +1,34 @@
+"""Micro-benchmarks for TokenService JWT creation and validation.
+
+Usage:
+    python -m benchmarks.bench_tokens --number 20000
+"""
+import argparse
+import timeit
+
+from benchmarks.common import configure
+
+
+def main(number: int, repeat: int) -> None:
+    from services.tokens_service import TokenService
+
+    service = TokenService(db=None)
+    data = {"sub": "bench@example.com"}
+    token = service.create_access_token(data=data)
+
+    cases = {
+        "create_access_token": lambda: service.create_access_token(data=data),
+        "validate_access_token": lambda: service.validate_access_token(token),
+    }
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+        print(f"{name:<24} {best * 1e6:8.2f} us/op  {1 / best:10.0f} ops/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    configure()
+    main(args.number, args.repeat)
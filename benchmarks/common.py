@@ -0,0 +1,91 @@
+"""Shared setup for the benchmark scripts.
+
+``configure()`` must run before anything imports ``database`` or ``main``
+because those modules read their settings at import time.
+"""
+from dataclasses import dataclass, field
+import os
+import statistics
+import tempfile
+import time
+
+
+def configure(database_url: str | None = None) -> str:
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-change-me-0123456789")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("EMAIL_TOKEN_EXPIRE_MINUTES", "5")
+    os.environ.setdefault("URL", "http://bench")
+    # Every benchmark request comes from one client IP
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return database_url
+
+
+FAKE_GOOGLE_USERINFO = {
+    "sub": "google-bench-subject",
+    "email": "google-bench@example.com",
+    "email_verified": True,
+    "name": "Bench User",
+    "given_name": "Bench",
+    "family_name": "User",
+    "picture": "https://example.com/bench.png",
+}
+
+
+def install_stubs() -> None:
+    """Replace SMTP delivery and the Google token exchange with in-process no-ops."""
+    import routes.auth_routes as auth_routes
+    from utils.email_utlis import smtp_pool
+
+    async def _send(message):
+        return None
+
+    async def _authorize_access_token(request):
+        return {"userinfo": dict(FAKE_GOOGLE_USERINFO)}
+
+    smtp_pool.send = _send
+    auth_routes.oauth_google_authorize_access_token = _authorize_access_token
+
+
+def seed_users(count: int) -> list[str]:
+    from database import SessionLocal, create_db_and_tables
+    # Schema creation moved into the app lifespan, which ASGITransport does not run
+    from models import code_validation_models, rate_limit_models, token_models  # noqa: F401
+    from models.users_models import User
+
+    create_db_and_tables()
+    emails = [f"bench-{i}@example.com" for i in range(count)]
+    with SessionLocal() as db:
+        existing = {email for (email,) in db.query(User.email).filter(User.email.in_(emails))}
+        db.add_all(User(email=email) for email in emails if email not in existing)
+        db.commit()
+    return emails
+
+
+@dataclass
+class LatencyStats:
+    name: str
+    samples: list[float] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def row(self) -> str:
+        rps = len(self.samples) / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.name:<24} n={len(self.samples):<6} "
+            f"p50={self.percentile(50) * 1000:8.2f}ms p95={self.percentile(95) * 1000:8.2f}ms "
+            f"p99={self.percentile(99) * 1000:8.2f}ms mean={statistics.fmean(self.samples) * 1000:8.2f}ms "
+            f"rps={rps:9.1f}"
+        )
+
+
+def timed(fn, *args, **kwargs) -> float:
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - started
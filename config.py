@@ -0,0 +1,114 @@
+from functools import lru_cache
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Every environment variable the app reads, parsed once.
+
+    Values come from the process environment, then ``.env``. Field names are
+    the lower-cased variable names (``DATABASE_URL`` -> ``database_url``).
+    """
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+    # ==================== JWT ====================
+    secret_key: Optional[str] = None
+    algorithm: Optional[str] = None
+    # JSON list of {"kid", "alg", and one of "secret" / "private_key" (PEM) / "private_key_path"}
+    jwt_keys: Optional[str] = None
+    jwt_active_kid: Optional[str] = None
+    jwks_max_age_seconds: int = 300
+    email_token_expire_minutes: int = 5
+    access_token_expire_minutes: int = 30
+    refresh_token_expire_days: int = 7
+    # Required by /auth/introspect; the endpoint is disabled while unset
+    introspection_api_key: Optional[str] = None
+
+    # ==================== DATABASE ====================
+    database_url: str = "sqlite:///./test.db"
+    async_database_url: Optional[str] = None
+    # dev | sqlite-prod | postgres; derived from database_url when unset
+    db_profile: Optional[str] = None
+    # Pool sizing defaults depend on the profile
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_timeout: float = 30
+    db_pool_recycle_seconds: int = 1800
+    db_prepare_threshold: int = 5
+    db_query_cache_size: int = 1000
+    db_raiseload: bool = False
+    # Run create_all at startup; turn off when the schema is managed by migrations
+    db_create_tables: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kb: int = 64 * 1024
+
+    # ==================== CACHES / SWEEPER ====================
+    revocation_filter_capacity: int = 100_000
+    revocation_filter_error_rate: float = 0.01
+    revocation_lru_size: int = 10_000
+    principal_cache_size: int = 10_000
+    principal_cache_ttl_seconds: float = 60
+    # local | postgres; derived from database_url when unset
+    revocation_channel: Optional[str] = None
+    revocation_channel_name: str = "token_revocations"
+    revocation_channel_reconnect_seconds: float = 1.0
+    sweeper_enabled: bool = False
+    sweeper_interval_seconds: float = 300
+    sweeper_batch_size: int = 1000
+    sweeper_batch_pause_seconds: float = 0.05
+
+    # ==================== PHONE VERIFICATION ====================
+    phone_email_code_expire_minutes: int = 10
+    phone_email_code_max_attempts: int = 5
+    # Falls back to secret_key
+    verification_code_hmac_key: Optional[str] = None
+    default_phone_country_code: str = ""
+
+    # ==================== EMAIL ====================
+    smtp_server: Optional[str] = None
+    smtp_port: int = 587
+    smtp_user: Optional[str] = None
+    smtp_password: Optional[str] = None
+    smtp_reply_to: Optional[str] = None
+    smtp_pool_size: int = 2
+    smtp_use_tls: bool = False
+    smtp_start_tls: bool = True
+    url: Optional[str] = None
+    email_templates_dir: Optional[str] = None
+    email_templates_auto_reload: bool = False
+
+    # ==================== GOOGLE OAUTH ====================
+    google_client_id: Optional[str] = None
+    google_client_secret: Optional[str] = None
+    google_metadata_url: str = "https://accounts.google.com/.well-known/openid-configuration"
+    oauth_metadata_ttl_seconds: float = 3600
+    # Optional file used to survive cold starts without hitting the provider
+    oauth_metadata_cache_path: Optional[str] = None
+
+    # ==================== RATE LIMITS ====================
+    rate_limit_enabled: bool = True
+    # memory: per process (single worker / tests); database: shared by every worker through rate_limit_buckets
+    rate_limit_backend: str = "memory"
+    rate_limit_max_keys: int = 100_000
+    # Only honour X-Forwarded-For behind a proxy that sets it
+    rate_limit_trust_forwarded_for: bool = False
+    rate_limit_login_per_email: str = "5/minute"
+    rate_limit_login_per_ip: str = "30/minute"
+    rate_limit_phone_code_per_phone: str = "3/minute"
+    rate_limit_phone_code_per_email: str = "5/minute"
+    rate_limit_phone_code_per_ip: str = "30/minute"
+
+    # ==================== OBSERVABILITY ====================
+    metrics_enabled: bool = True
+    sql_profile: bool = False
+    # Lets any client turn profiling on per request: development only
+    sql_profile_allow_header: bool = False
+    sql_profile_slow_ms: float = 100
+    sql_profile_repeat_threshold: int = 3
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
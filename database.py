@@ -1,32 +1,266 @@
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, raiseload, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from threading import Lock
+import time
+from config import get_settings
 from models.users_models import Base
+from utils.metrics import METRICS_ENABLED, record_db_statement
+from utils.sql_profiler import SQL_PROFILE_AVAILABLE, record_profiled_statement
+
+settings = get_settings()
+
+DATABASE_URL = settings.database_url
+
+
+def _to_async_url(url: str) -> str:
+    """Map a sync SQLAlchemy URL to its async driver (aiosqlite / psycopg3 async)."""
+    if url.startswith("sqlite+aiosqlite:") or url.startswith("postgresql+psycopg:"):
+        return url
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite:" + url.split(":", 1)[1]
+    if url.startswith("postgresql") or url.startswith("postgres:"):
+        return "postgresql+psycopg:" + url.split(":", 1)[1]
+    return url
+
+
+ASYNC_DATABASE_URL = settings.async_database_url or _to_async_url(DATABASE_URL)
+
+# ==================== ENGINE PROFILES ====================
+# dev: SQLite as-is (foreign keys only)
+# sqlite-prod: SQLite with WAL, relaxed fsync, busy timeout and mmap
+# postgres: psycopg3 with server-side prepared statements and a sized, pre-pinged pool
+DB_PROFILE = settings.db_profile or ("postgres" if DATABASE_URL.startswith("postgres") else "dev")
+DB_POOL_SIZE = settings.db_pool_size or (5 if DB_PROFILE == "dev" else 10)
+DB_MAX_OVERFLOW = settings.db_max_overflow if settings.db_max_overflow is not None else (10 if DB_PROFILE == "dev" else 20)
+DB_POOL_TIMEOUT = settings.db_pool_timeout
+DB_POOL_RECYCLE_SECONDS = settings.db_pool_recycle_seconds
+# psycopg prepares a statement server-side after it ran this many times on a connection
+DB_PREPARE_THRESHOLD = settings.db_prepare_threshold
+# SQLAlchemy compiled-statement cache, per engine
+DB_QUERY_CACHE_SIZE = settings.db_query_cache_size
+SQLITE_BUSY_TIMEOUT_MS = settings.sqlite_busy_timeout_ms
+SQLITE_MMAP_SIZE = settings.sqlite_mmap_size
+SQLITE_CACHE_SIZE_KB = settings.sqlite_cache_size_kb
+
+if DB_PROFILE not in ("dev", "sqlite-prod", "postgres"):
+    raise RuntimeError(f"Unknown DB_PROFILE {DB_PROFILE!r} (expected dev, sqlite-prod or postgres)")
+
+SQLITE_PRAGMAS = {
+    "dev": ["foreign_keys=ON"],
+    "sqlite-prod": [
+        "foreign_keys=ON",
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"mmap_size={SQLITE_MMAP_SIZE}",
+        f"cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        "temp_store=MEMORY",
+    ],
+}
+
+
+class PoolMetrics:
+    """Checkout wait time and timeouts for one pool class (survives pool recreation)."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def stats(self, pool) -> dict:
+        attempts = self.checkouts + self.timeouts
+        stats = {
+            "pool": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / attempts, 6) if attempts else 0.0,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                # overflow() counts up from -pool_size; only connections beyond pool_size matter
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return stats
+
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def connect(self):
+        # Wait for a free slot + opening an overflow connection + pre-ping
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    parsed = make_url(url)
+    options = {"query_cache_size": DB_QUERY_CACHE_SIZE}
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+        if DB_PROFILE == "sqlite-prod":
+            # The driver-level lock wait, in seconds, mirrors busy_timeout
+            connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection; keep SQLAlchemy's default pool
+            return {**options, "connect_args": connect_args}
+    else:
+        options.update(pool_pre_ping=True, pool_recycle=DB_POOL_RECYCLE_SECONDS, pool_use_lifo=True)
+        if parsed.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = DB_PREPARE_THRESHOLD
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args=connect_args,
+    )
+    return options
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
 engine = create_engine(
     DATABASE_URL,
     # echo=True,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    **_engine_options(DATABASE_URL, TimedQueuePool),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the request path so queries never block the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, TimedAsyncQueuePool))
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
 
-# Enable SQLite foreign key constraints when using SQLite
+def check_schema():
+    """Fail fast when existing tables lack columns the models need (create_all never alters tables)."""
+    inspector = inspect(engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    if missing:
+        raise RuntimeError(
+            f"Database schema is out of date (missing {', '.join(missing)}); run `alembic upgrade head`"
+        )
+
+def dialect_insert(bind):
+    """``insert()`` with ``ON CONFLICT`` support for ``bind``'s dialect (an engine or session bind)."""
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Upserts are not supported for dialect {dialect!r} (expected sqlite or postgresql)")
+
+async def dispose_engines():
+    await async_engine.dispose()
+    engine.dispose()
+
+# Apply the profile's SQLite pragmas on every new connection
 if "sqlite" in DATABASE_URL:
     @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma in SQLITE_PRAGMAS.get(DB_PROFILE, SQLITE_PRAGMAS["dev"]):
+            cursor.execute(f"PRAGMA {pragma}")
         cursor.close()
 
+# ==================== STATEMENT TIMING ====================
+# One timer per statement feeds both /metrics and the opt-in request SQL profiler
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+def _instrument_statements(target, label: str):
+    @event.listens_for(target, "before_cursor_execute")
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        if METRICS_ENABLED:
+            operation = statement.lstrip()[:6].upper()
+            record_db_statement(label, operation if operation in _OPERATIONS else "OTHER", elapsed)
+        record_profiled_statement(statement, elapsed)
+
+if METRICS_ENABLED or SQL_PROFILE_AVAILABLE:
+    _instrument_statements(engine, "sync")
+    _instrument_statements(async_engine.sync_engine, "async")
+
+# Turn every unplanned lazy load into an error (tests / local profiling).
+# Only top-level SELECTs get the option, so explicit loader strategies still apply.
+if settings.db_raiseload:
+    @event.listens_for(Session, "do_orm_execute")
+    def raise_on_lazy_load(orm_execute_state):
+        if (
+            orm_execute_state.is_select
+            and not orm_execute_state.is_column_load
+            and not orm_execute_state.is_relationship_load
+        ):
+            orm_execute_state.statement = orm_execute_state.statement.options(
+                raiseload("*", sql_only=True)
+            )
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_stats() -> dict:
+    """Pool occupancy, overflow and checkout wait for both engines."""
+    return {
+        "profile": DB_PROFILE,
+        "sync": TimedQueuePool.metrics.stats(engine.pool),
+        "async": TimedAsyncQueuePool.metrics.stats(async_engine.pool),
+    }
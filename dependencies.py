@@ -1,7 +1,18 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials
 from services.tokens_service import bearer_scheme, get_token_service, TokenService
 from services.users_services import UserService, get_user_service
+from services.principal_cache import principal_cache
+from utils.phone_utils import normalize_phone_number
+from utils.rate_limit import (
+    rate_limiter,
+    client_ip,
+    LOGIN_PER_EMAIL,
+    LOGIN_PER_IP,
+    PHONE_CODE_PER_PHONE,
+    PHONE_CODE_PER_EMAIL,
+    PHONE_CODE_PER_IP,
+)
 from models.users_models import User, UserRole
 from typing import Annotated
 from fastapi import status
@@ -15,10 +26,15 @@ async def get_current_user(
     token_service: TokenService = get_token_service()
     token_data = token_service.validate_access_token(token)
     email = token_data.get("sub")
-    
-    user = user_service.get_user_by_email(email=email)
+
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    user = await user_service.get_user_by_email(email=email)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
+    principal_cache.set(email, user)
     return user
 
 async def get_current_active_user(
@@ -33,4 +49,21 @@ async def get_current_active_admin_user(
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin user required")
-    return current_user
\ No newline at end of file
+    return current_user
+
+# ==================== RATE LIMITS ====================
+# Endpoints that send an email per call. The IP bucket is checked first and a
+# denial stops there, so one client's flood never spends the shared buckets.
+
+async def limit_login(request: Request, email: str):
+    await rate_limiter.check(
+        (f"login:ip:{client_ip(request)}", LOGIN_PER_IP),
+        (f"login:email:{email.strip().lower()}", LOGIN_PER_EMAIL),
+    )
+
+async def limit_phone_verification_code(request: Request, phone_number: str, email: str):
+    await rate_limiter.check(
+        (f"phone-code:ip:{client_ip(request)}", PHONE_CODE_PER_IP),
+        (f"phone-code:phone:{normalize_phone_number(phone_number)}", PHONE_CODE_PER_PHONE),
+        (f"phone-code:email:{email.strip().lower()}", PHONE_CODE_PER_EMAIL),
+    )
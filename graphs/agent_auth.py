@@ -1,18 +1,55 @@
 from langgraph.graph.message import MessagesState
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
-from langgraph.types import interrupt
+from langgraph.types import interrupt, Command
 from langgraph.prebuilt import InjectedState
 from typing import Annotated
-from langchain_core.messages import AnyMessage
+from langchain_core.messages import AnyMessage, ToolMessage
+from langchain_core.tools import InjectedToolCallId
+import asyncio
+import importlib.util
 import os
+import time
 import httpx
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8001")
+BACKEND_TIMEOUT_SECONDS = float(os.getenv("BACKEND_TIMEOUT_SECONDS", "5.0"))
+USER_CONTEXT_TTL_SECONDS = float(os.getenv("USER_CONTEXT_TTL_SECONDS", "300"))
+# HTTP/2 is negotiated only when the optional `h2` package is installed
+BACKEND_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_backend_client: httpx.AsyncClient | None = None
+_backend_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_backend_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for BACKEND_URL, bound to the running event loop."""
+    global _backend_client, _backend_client_loop
+    loop = asyncio.get_running_loop()
+    if _backend_client is None or _backend_client.is_closed or _backend_client_loop is not loop:
+        _backend_client = httpx.AsyncClient(
+            base_url=BACKEND_URL,
+            timeout=BACKEND_TIMEOUT_SECONDS,
+            http2=BACKEND_HTTP2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+        )
+        _backend_client_loop = loop
+    return _backend_client
+
+
+async def close_backend_client() -> None:
+    global _backend_client, _backend_client_loop
+    if _backend_client is not None:
+        await _backend_client.aclose()
+    _backend_client = None
+    _backend_client_loop = None
 
 class State(MessagesState):
     remaining_steps: int
     phone_number: str | None = None
+    # User resolved from the backend, cached per thread; None when not registered
+    user: dict | None = None
+    user_fetched_at: float | None = None
 
 model = ChatOpenAI(model="gpt-5-mini")
 
@@ -29,22 +66,35 @@ model = ChatOpenAI(model="gpt-5-mini")
 
 # """
 
-async def prompt(state: State) -> list[AnyMessage]:  
-    phone_number = state["phone_number"]
+async def resolve_user_context(state: State) -> dict:
+    """Pre-model hook: fetch the user only on the first turn or once the cached copy is stale."""
+    fetched_at = state.get("user_fetched_at")
+    if fetched_at is not None and time.time() - fetched_at < USER_CONTEXT_TTL_SECONDS:
+        return {}
 
+    phone_number = state["phone_number"]
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{BACKEND_URL}/users/phone/{phone_number}", timeout=5.0)
-        
-            if response.status_code == 404:
-                user = None
-            else:
-                user = response.json()
+        response = await get_backend_client().get(f"/users/phone/{phone_number}")
+
+        if response.status_code == 404:
+            user = None
+        elif response.status_code == 200:
+            user = response.json()
+        else:
+            print(f"\n\nError: backend returned {response.status_code}\n\n")
+            # Only a user or a definite 404 is cached; 422/429/5xx are retried on the next turn
+            return {"user": None, "user_fetched_at": None}
     except Exception as e:
         print(f"\n\Error: {e}\n\n")
-        user = None
+        # Do not cache failures; retry on the next turn
+        return {"user": None, "user_fetched_at": None}
 
     print(f"\n\nUser: {user}\n\n")
+    return {"user": user, "user_fetched_at": time.time()}
+
+
+async def prompt(state: State) -> list[AnyMessage]:  
+    user = state.get("user")
 
     system_msg = f"""
 Eres un asistente util para ayudar a un usuario.
@@ -85,7 +135,7 @@ items = {
 cart_items = []
 
 
-def send_email_verification_code(
+async def send_email_verification_code(
     email: str,
     phone_number: Annotated[str | None, InjectedState("phone_number")] = None,
 ):
@@ -93,9 +143,8 @@ def send_email_verification_code(
     if not phone_number:
         return {"messages": "Necesito tu número de teléfono para enviar el código de verificación."}
     try:
-        response = httpx.post(
-            f"{BACKEND_URL}/users/phone/{phone_number}/send-verification-code/{email}",
-            timeout=5.0,
+        response = await get_backend_client().post(
+            f"/users/phone/{phone_number}/send-verification-code/{email}",
         )
     except Exception:
         return {"messages": "Error conectando con el backend para enviar el código"}
@@ -104,15 +153,19 @@ def send_email_verification_code(
     return {"messages": "Código de verificación enviado. Revisa tu email e ingresa el código."}
 
 
-def verify_email_verification_code(email: str, code: str, phone_number: Annotated[str | None, InjectedState("phone_number")] = None):
+async def verify_email_verification_code(
+    email: str,
+    code: str,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    phone_number: Annotated[str | None, InjectedState("phone_number")] = None,
+):
     """Verifica si el código de verificación es válido a través del backend."""
     if not phone_number:
         return {"messages": "Necesito tu número de teléfono para verificar el código."}
     try:
-        response = httpx.post(
-            f"{BACKEND_URL}/users/phone/{phone_number}/verify-code/{email}",
+        response = await get_backend_client().post(
+            f"/users/phone/{phone_number}/verify-code/{email}",
             params={"code": code},
-            timeout=5.0,
         )
     except Exception:
         return {"messages": "Error conectando con el backend para verificar el código"}
@@ -124,15 +177,22 @@ def verify_email_verification_code(email: str, code: str, phone_number: Annotate
         user = None
     if not user:
         return {"messages": "Código inválido."}
-    return {"messages": f"{user}"}
+    # The phone is now linked: refresh the cached user context for the next turns
+    return Command(
+        update={
+            "user": user,
+            "user_fetched_at": time.time(),
+            "messages": [ToolMessage(content=f"{user}", tool_call_id=tool_call_id)],
+        }
+    )
 
 
-def get_user_info(
+async def get_user_info(
     phone_number: Annotated[str | None, InjectedState("phone_number")] = None, 
 ):
     """Obtiene la información del usuario."""
     try:
-        response = httpx.get(f"{BACKEND_URL}/users/phone/{phone_number}", timeout=5.0)
+        response = await get_backend_client().get(f"/users/phone/{phone_number}")
         if response.status_code == 404:
             return {"messages": "Usuario no encontrado"}
         if response.status_code != 200:
@@ -196,5 +256,6 @@ graph = create_react_agent(
         send_email_verification_code, verify_email_verification_code, get_user_info, add_item_to_cart, 
         get_cart_items, remove_item_from_cart, get_item_price, process_payment],
     prompt=prompt,
+    pre_model_hook=resolve_user_context,
     state_schema=State,
 )
\ No newline at end of file
@@ -1,22 +1,77 @@
+from contextlib import asynccontextmanager
+import asyncio
+
 from fastapi import FastAPI
-import os
+from fastapi.responses import ORJSONResponse
 
 from starlette.middleware.sessions import SessionMiddleware
+from config import get_settings
 from routes.users_routes import users_router
 from routes.auth_routes import auth_router
-from utils.email_utlis import email_router
-from database import create_db_and_tables
-import uvicorn
+from routes.well_known_routes import well_known_router
+from routes.metrics_routes import metrics_router
+from utils.email_utlis import email_router, smtp_pool
+from database import check_schema, create_db_and_tables, dispose_engines
+from services.revocation_channel import revocation_channel, warm_revocation_cache
+from services.users_services import verification_code_key
+from services.sweeper_service import expiry_sweeper, SWEEPER_ENABLED
+from utils.auth_google_utils import GOOGLE_OAUTH_CONFIGURED, get_google_metadata_cache, oauth_transport
+from utils.metrics import MetricsMiddleware
+from utils.sql_profiler import SQLProfilerMiddleware
+
+settings = get_settings()
+
+
+def prepare_database():
+    # Fail at startup, not on the first verification code
+    verification_code_key()
+    # Blocking and ordered: the revocation cache reads tables create_all may have to create
+    if settings.db_create_tables:
+        create_db_and_tables()
+    check_schema()
+    # Only a cross-worker feed makes the cache's "not revoked" answers safe; the channel warms it on connect instead
+    if revocation_channel.connected:
+        warm_revocation_cache()
+
 
-create_db_and_tables()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Listen before warming the revocation cache, so no revocation falls in between
+    await revocation_channel.start()
+    # Database work and the OIDC metadata fetch are independent: overlap them
+    google_metadata_cache = get_google_metadata_cache() if GOOGLE_OAUTH_CONFIGURED else None
+    warm_ups = [asyncio.to_thread(prepare_database)]
+    if google_metadata_cache is not None:
+        warm_ups.append(google_metadata_cache.start())
+    await asyncio.gather(*warm_ups)
+    if SWEEPER_ENABLED:
+        expiry_sweeper.start()
 
-app = FastAPI()
+    yield
 
-app.add_middleware(SessionMiddleware, secret_key=os.getenv("SECRET_KEY"))
+    await expiry_sweeper.stop()
+    await revocation_channel.stop()
+    if google_metadata_cache is not None:
+        await google_metadata_cache.stop()
+    await oauth_transport.close_pool()
+    await smtp_pool.close()
+    await dispose_engines()
+
+
+# orjson renders every response that does not pick its own class
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
+# Opt-in (SQL_PROFILE=true, or "X-SQL-Profile: 1" when SQL_PROFILE_ALLOW_HEADER=true)
+app.add_middleware(SQLProfilerMiddleware)
+# Outermost, so the latency covers the whole stack
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(email_router)
+app.include_router(well_known_router)
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -24,4 +79,6 @@ def home():
     return {"message": "Hello World"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
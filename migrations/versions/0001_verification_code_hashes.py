@@ -0,0 +1,76 @@
+"""Store phone verification codes hashed, with a failed-attempt counter
+
+Replaces ``phone_email_verification_codes.code`` by ``code_hash`` and
+``attempts``. Pending plain-text codes cannot be carried over (they would
+have to be hashed with the app's key), so unused rows are deleted: they live
+for minutes and users simply request a new code.
+
+Safe on databases that create_all already built with the new columns.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 15:11:15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "phone_email_verification_codes"
+OLD_INDEXES = (
+    "idx_verification_lookup",
+    f"ix_{TABLE}_email",
+    f"ix_{TABLE}_phone_number",
+    f"ix_{TABLE}_code",
+)
+ACTIVE = sa.text("used_at IS NULL")
+
+
+def _columns() -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(TABLE):
+        return set()
+    return {column["name"] for column in inspector.get_columns(TABLE)}
+
+
+def upgrade() -> None:
+    columns = _columns()
+    if not columns or "code_hash" in columns:
+        return
+    existing_indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(TABLE)}
+
+    op.execute(sa.text(f"DELETE FROM {TABLE}"))
+    with op.batch_alter_table(TABLE) as batch:
+        for name in OLD_INDEXES:
+            if name in existing_indexes:
+                batch.drop_index(name)
+        batch.drop_column("code")
+        batch.add_column(sa.Column("code_hash", sa.String(64), nullable=False))
+        batch.add_column(sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index(
+        "idx_verification_active",
+        TABLE,
+        ["email", "phone_number", "code_hash", "expires_at"],
+        postgresql_where=ACTIVE,
+        sqlite_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    if "code_hash" not in _columns():
+        return
+    op.drop_index("idx_verification_active", table_name=TABLE)
+    op.execute(sa.text(f"DELETE FROM {TABLE}"))
+    with op.batch_alter_table(TABLE) as batch:
+        batch.drop_column("attempts")
+        batch.drop_column("code_hash")
+        batch.add_column(sa.Column("code", sa.String(6), nullable=False))
+    op.create_index("idx_verification_lookup", TABLE, ["email", "phone_number", "code"])
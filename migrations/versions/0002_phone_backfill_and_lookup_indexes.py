@@ -0,0 +1,76 @@
+"""Normalize stored phone numbers to E.164 and add the listing/lookup/expiry indexes
+
+Lookups normalize their input, so rows written before normalization have to
+be rewritten to be found again. Numbers without a country code use
+DEFAULT_PHONE_COUNTRY_CODE; rows that still cannot be normalized, or that
+would collide with another row's number, are left as they are and listed in
+the log. Fix or merge those by hand (or set DEFAULT_PHONE_COUNTRY_CODE) and
+re-run with ``alembic downgrade 0001 && alembic upgrade head``.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 15:03:24
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.phone_utils import to_e164
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+INDEXES = (
+    ("idx_users_created_at_id", "users", ["created_at", "id"]),
+    ("idx_social_account_user_id", "user_social_accounts", ["user_id"]),
+    ("idx_phone_user_id", "user_phones", ["user_id"]),
+    ("idx_user_phones_created_at_id", "user_phones", ["created_at", "id"]),
+    ("idx_verification_expires_at", "phone_email_verification_codes", ["expires_at"]),
+)
+
+user_phones = sa.table("user_phones", sa.column("id"), sa.column("phone"))
+
+
+def _backfill_phones(bind) -> None:
+    rows = bind.execute(sa.select(user_phones.c.id, user_phones.c.phone)).all()
+    taken = {phone for _, phone in rows}
+    for row_id, phone in rows:
+        normalized = to_e164(phone)
+        if normalized == phone:
+            continue
+        if normalized is None:
+            logger.warning("user_phones %s: cannot normalize %r, left unchanged", row_id, phone)
+            continue
+        if normalized in taken:
+            logger.warning("user_phones %s: %r normalizes to %s, already in use; left unchanged", row_id, phone, normalized)
+            continue
+        bind.execute(sa.update(user_phones).where(user_phones.c.id == row_id).values(phone=normalized))
+        taken.discard(phone)
+        taken.add(normalized)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for name, table, columns in INDEXES:
+        if inspector.has_table(table) and name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+    if inspector.has_table("user_phones"):
+        _backfill_phones(bind)
+
+
+def downgrade() -> None:
+    # Normalized numbers are still valid input; only the indexes are dropped
+    inspector = sa.inspect(op.get_bind())
+    for name, table, _ in INDEXES:
+        if inspector.has_table(table) and name in {index["name"] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
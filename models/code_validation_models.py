@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime, Index
+from sqlalchemy import String, DateTime, Index, Integer, text
 from datetime import datetime
 from typing import Optional
 
@@ -11,16 +11,27 @@ class PhoneEmailVerificationCode(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 
-    email: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
-    phone_number: Mapped[str] = mapped_column(String(20), index=True, nullable=False)
-    code: Mapped[str] = mapped_column(String(6), index=True, nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    phone_number: Mapped[str] = mapped_column(String(20), nullable=False)
+    # HMAC-SHA256 (hex) of email + phone + code; the plain code is only ever emailed
+    code_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Failed verifies against this email/phone while the code was active
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     used_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     __table_args__ = (
-        Index("idx_verification_lookup", "email", "phone_number", "code"),
+        # Only unused codes are ever looked up; expires_at rides along as a range filter
+        Index(
+            "idx_verification_active",
+            "email",
+            "phone_number",
+            "code_hash",
+            "expires_at",
+            postgresql_where=text("used_at IS NULL"),
+            sqlite_where=text("used_at IS NULL"),
+        ),
+        Index("idx_verification_expires_at", "expires_at"),
     )
-
-
@@ -0,0 +1,24 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Float, Index
+
+from models.users_models import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by every worker when ``RATE_LIMIT_BACKEND=database``.
+
+    Times are epoch seconds so the refill arithmetic stays inside one portable
+    statement. ``full_at`` is when the bucket is back to capacity; after that
+    the row carries no information and the sweeper deletes it.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    # Bucket key, e.g. "login:email:someone@example.com"
+    id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
+    full_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("idx_rate_limit_buckets_full_at", "full_at"),
+    )
@@ -67,6 +67,10 @@ class User(Base):
         passive_deletes=True,
     )
 
+    __table_args__ = (
+        Index("idx_users_created_at_id", "created_at", "id"),
+    )
+
     def __repr__(self) -> str:
         """Representación legible del objeto."""
         return f"<User(id={self.id}, email='{self.email}', email='{self.email}')>"
@@ -120,6 +124,7 @@ class UserSocialAccount(Base):
     __table_args__ = (
         UniqueConstraint("provider", "provider_id", name="uq_provider_social_account"),
         Index("idx_provider_lookup", "provider", "provider_id"),
+        Index("idx_social_account_user_id", "user_id"),
     )
 
     def __repr__(self) -> str:
@@ -161,4 +166,6 @@ class UserPhone(Base):
     __table_args__ = (
         UniqueConstraint("phone", name="uq_phone"),
         Index("idx_phone_lookup", "phone"),
+        Index("idx_phone_user_id", "user_id"),
+        Index("idx_user_phones_created_at_id", "created_at", "id"),
     )
\ No newline at end of file
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header
+from datetime import datetime, timezone
+import hmac
 from starlette.requests import Request
 from authlib.integrations.starlette_client import OAuthError
-import os
 
 from utils.email_utlis import send_verification_email
 from utils.auth_google_utils import oauth_google_authorize_redirect, oauth_google_authorize_access_token
@@ -12,26 +12,32 @@ from services.tokens_service import (
     TokenPair,
     bearer_scheme,
 )
-from services.users_services import get_user_service, UserService
+from services.users_services import get_user_service, UserService, USER_COLUMNS_LOAD
+from dependencies import limit_login
 from fastapi.security import HTTPAuthorizationCredentials
 from models.token_models import TokenType
 from models.users_models import User
+from schemas.tokens_schemas import IntrospectionRequest, IntrospectionResult
+from config import get_settings
+
+# Introspection returns full claims, so it stays disabled (404) until a key is configured
+INTROSPECTION_API_KEY = get_settings().introspection_api_key
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
 # ==================== EMAIL AUTHENTICATION ====================
 
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[Depends(limit_login)])
 async def send_token(
     email: str,
     background_tasks: BackgroundTasks,
     user_service: UserService = Depends(get_user_service),
     token_service: TokenService = Depends(get_token_service),
 ):
-    user = user_service.get_user_by_email(email)
+    user = await user_service.get_user_by_email(email, load=USER_COLUMNS_LOAD)
     if not user:
         user = User(email=email)
-        user = user_service.create_user(user)
+        user = await user_service.create_user(user)
 
     token = token_service.create_email_verification_token(data={"sub": user.email})
     background_tasks.add_task(send_verification_email, email, token)
@@ -59,30 +65,10 @@ async def verify_email_token(token: str, token_service: TokenService = Depends(g
 @auth_router.post("/refresh")
 async def refresh_tokens(
     refresh_token: str,
-    user_service: UserService = Depends(get_user_service),
     token_service: TokenService = Depends(get_token_service),
 ):
-
-    payload = token_service.validate_refresh_token(refresh_token)
-    email = payload.get("sub")
-    old_jti = payload["jti"]
-    user = user_service.get_user_by_email(email)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
-
-    # Rotate refresh token: blacklist the old refresh jti
-    token_service.blacklist_token(
-        jti=old_jti,
-        token_type=TokenType.REFRESH,
-        user_id=user.id,
-        expires_at=datetime.fromtimestamp(payload["exp"]),
-        reason="rotated",
-    )
-
-    access_token = token_service.create_access_token(data={"sub": user.email})
-    new_refresh_token = token_service.create_refresh_token(data={"sub": user.email})
-
-    return TokenPair(access_token=access_token, refresh_token=new_refresh_token, token_type="bearer")
+    # Rotation (subject check + blacklisting the old jti + replay detection) is one statement
+    return await token_service.rotate_refresh_token(refresh_token)
 
 
 @auth_router.post("/logout")
@@ -99,25 +85,44 @@ async def logout(
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
 
-    user = user_service.get_user_by_email(email)
+    user = await user_service.get_user_by_email(email, load=USER_COLUMNS_LOAD)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
 
     if refresh_token:
-        payload_r = token_service.validate_refresh_token(refresh_token)
+        payload_r = await token_service.validate_refresh_token(refresh_token)
         r_jti = payload_r.get("jti")
         r_exp = payload_r.get("exp")
         if r_jti:
-            token_service.blacklist_token(
+            await token_service.blacklist_token(
                 jti=r_jti,
                 token_type=TokenType.REFRESH,
                 user_id=user.id,
-                expires_at=datetime.fromtimestamp(r_exp),
+                expires_at=datetime.fromtimestamp(r_exp, tz=timezone.utc),
                 reason="logout",
             )
 
     return {"message": "Logged out"}
 
+@auth_router.post("/introspect", response_model=list[IntrospectionResult])
+async def introspect_tokens(
+    request: IntrospectionRequest,
+    x_introspection_key: str | None = Header(default=None),
+    token_service: TokenService = Depends(get_token_service),
+):
+    """
+    Batch token introspection for gateways and sidecars.
+
+    Signatures are verified in one pass and every jti is checked against the
+    blocklist with a single query. Results are returned in request order.
+    Requires ``X-Introspection-Key``; returns 404 when ``INTROSPECTION_API_KEY`` is unset.
+    """
+    if not INTROSPECTION_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_introspection_key or not hmac.compare_digest(x_introspection_key, INTROSPECTION_API_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid introspection key")
+    return await token_service.introspect_tokens(request.tokens)
+
 # ==================== GOOGLE AUTHENTICATION ====================
 
 @auth_router.get("/google/login")
@@ -147,6 +152,6 @@ async def callback_via_google(request: Request, user_service: UserService = Depe
     if not token:
         raise HTTPException(status_code=400, detail="No token returned from Google")
     
-    access_token, refresh_token = user_service.process_google_login(token['userinfo'])
+    access_token, refresh_token = await user_service.process_google_login(token['userinfo'])
 
     return TokenPair(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
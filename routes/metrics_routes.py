@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Response
+
+from database import pool_stats
+from services.principal_cache import principal_cache
+from services.revocation_cache import revocation_cache
+from services.revocation_channel import revocation_channel
+from services.sweeper_service import expiry_sweeper
+from utils.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from utils.rate_limit import rate_limiter
+
+metrics_router = APIRouter(tags=["metrics"])
+
+# Existing stats() dictionaries are read only when Prometheus scrapes
+metrics.register_stats("db_pool", "Connection pool occupancy and checkout wait.", pool_stats, ("engine",))
+metrics.register_stats("revocation_cache", "Token revocation cache counters.", revocation_cache.stats)
+metrics.register_stats("revocation_channel", "Cross-worker revocation feed.", revocation_channel.stats)
+metrics.register_stats("principal_cache", "Authenticated principal cache counters.", principal_cache.stats)
+metrics.register_stats("expiry_sweeper", "Expiry sweeper progress.", expiry_sweeper.stats, ("table",))
+metrics.register_stats("rate_limit", "Requests rejected by the rate limiter.", lambda: {"rejected": rate_limiter.rejected})
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,56 +1,104 @@
-from fastapi import Depends, APIRouter, HTTPException, status, BackgroundTasks
+from fastapi import Depends, APIRouter, HTTPException, status, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import Annotated
-from dependencies import get_current_active_user, get_current_active_admin_user
-from schemas.users_schemas import UserUpdate, UserResponse, UserSocialAccountBase
-from services.users_services import UserService, get_user_service
+from dependencies import get_current_active_user, get_current_active_admin_user, limit_phone_verification_code
+from schemas.users_schemas import (
+    UserUpdate,
+    UserResponse,
+    UserSocialAccountBase,
+    UserPhoneResponse,
+    VerificationCodeSent,
+)
+from services.users_services import UserService, get_user_service, USER_COLUMNS_LOAD
 from uuid import UUID
 from models.users_models import User
+from database import AsyncSessionLocal
+from utils.pagination_utils import decode_cursor, set_next_page_headers
 from utils.email_utlis import send_phone_number_verification_email_utils
 
 users_router = APIRouter(prefix="/users", tags=["users"])
 
-@users_router.get("/")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@users_router.get("/", response_model=list[UserResponse])
 async def get_all_users(
     # current_admin_user: Annotated[UserBase, Depends(get_current_active_admin_user)],
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    stream: bool = False,
     user_service: UserService = Depends(get_user_service)
 ):
-    return user_service.get_all_users()
+    if stream:
+        async def ndjson():
+            # The stream outlives the request-scoped session, so it owns its own
+            async with AsyncSessionLocal() as db:
+                async for user in UserService(db).stream_users():
+                    yield UserResponse.model_validate(user).model_dump_json() + "\n"
+        return StreamingResponse(ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    users, next_after = await user_service.get_users_page(limit, decode_cursor(cursor))
+    set_next_page_headers(request, response, next_after)
+    return users
 
 @users_router.get("/email/{email}", response_model=UserResponse)
 async def get_user_by_email(
     email: str,
     user_service: UserService = Depends(get_user_service),
 ):
-    return user_service.get_user_by_email(email)
+    user = await user_service.get_user_by_email(email)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
 
-@users_router.get("/{user_id}")
+@users_router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: UUID,
     user_service: UserService = Depends(get_user_service),
 ):
-    user = user_service.get_user(user_id)
+    user = await user_service.get_user(user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
-@users_router.get("/phone/")
+@users_router.get("/phone/", response_model=list[UserPhoneResponse])
 async def get_all_phone_numbers(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    stream: bool = False,
     user_service: UserService = Depends(get_user_service),
 ):
-    return user_service.get_all_phone_numbers()
+    if stream:
+        async def ndjson():
+            async with AsyncSessionLocal() as db:
+                async for phone in UserService(db).stream_phone_numbers():
+                    yield UserPhoneResponse.model_validate(phone).model_dump_json() + "\n"
+        return StreamingResponse(ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    phones, next_after = await user_service.get_phone_numbers_page(limit, decode_cursor(cursor))
+    set_next_page_headers(request, response, next_after)
+    return phones
 
 @users_router.get("/phone/{phone_number}", response_model=UserResponse)
 async def get_user_by_phone_number(
     phone_number: str,
     user_service: UserService = Depends(get_user_service),
 ):
-    user = user_service.get_user_by_phone_number(phone_number)
+    user = await user_service.get_user_by_phone_number(phone_number)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
 
-@users_router.post("/phone/{phone_number}/send-verification-code/{email}")
+@users_router.post(
+    "/phone/{phone_number}/send-verification-code/{email}",
+    response_model=VerificationCodeSent,
+    dependencies=[Depends(limit_phone_verification_code)],
+)
 async def send_phone_number_verification_code(
     phone_number: str,
     email: str,
@@ -58,10 +106,10 @@ async def send_phone_number_verification_code(
     user_service: UserService = Depends(get_user_service),
 ):
 
-    code = user_service.get_phone_number_verification_email_code(phone_number, email)
+    code = await user_service.get_phone_number_verification_email_code(phone_number, email)
     background_tasks.add_task(send_phone_number_verification_email_utils, email, code)
 
-    return {"message": "Verification code sent", "email": email}
+    return VerificationCodeSent(message="Verification code sent", email=email)
 
 
 @users_router.post("/phone/{phone_number}/verify-code/{email}", response_model=UserResponse)
@@ -71,7 +119,7 @@ async def verify_phone_number_verification_code(
     code: str,
     user_service: UserService = Depends(get_user_service),
 ):
-    result = user_service.validate_phone_number_verification_code(email, phone_number, code)
+    result = await user_service.validate_phone_number_verification_code(email, phone_number, code)
     if not result:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid verification code")
     if isinstance(result, dict) and result.get("error"):
@@ -79,25 +127,25 @@ async def verify_phone_number_verification_code(
     return result
 
 
-@users_router.delete("/{user_id}")
+@users_router.delete("/{user_id}", response_model=UserResponse)
 async def delete_user(
     user_id: UUID,
     user_service: UserService = Depends(get_user_service),
 ):
-    user = user_service.get_user(user_id)
+    user = await user_service.get_user(user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
-    return user_service.delete_user(user)
+    return await user_service.delete_user(user)
 
-@users_router.patch("/{user_id}/admin")
+@users_router.patch("/{user_id}/admin", response_model=UserResponse)
 async def make_user_admin(
     user_id: UUID,
     user_service: UserService = Depends(get_user_service),
 ):
-    user = user_service.get_user(user_id)
+    user = await user_service.get_user(user_id, load=USER_COLUMNS_LOAD)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
-    return user_service.make_user_admin(user)
+    return await user_service.make_user_admin(user)
 
 @users_router.get("/me/", response_model=UserResponse)
 async def read_users_me(
@@ -111,7 +159,7 @@ async def update_user(
     current_user: Annotated[User, Depends(get_current_active_user)],
     user_service: UserService = Depends(get_user_service),
 ):
-    return user_service.update_user(current_user, user)
+    return await user_service.update_user(current_user, user)
 
 @users_router.get("/me/social-accounts/", response_model=list[UserSocialAccountBase])
 async def get_user_social_accounts(
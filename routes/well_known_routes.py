@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from services.key_ring import key_ring, JWKS_MAX_AGE_SECONDS
+
+well_known_router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+
+@well_known_router.get("/jwks.json")
+async def get_jwks(response: Response):
+    # Downstream services cache this and verify access tokens locally
+    response.headers["Cache-Control"] = f"public, max-age={JWKS_MAX_AGE_SECONDS}"
+    return key_ring.jwks()
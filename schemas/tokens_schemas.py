@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class IntrospectionRequest(BaseModel):
+    tokens: list[str] = Field(min_length=1, max_length=500)
+
+
+class IntrospectionResult(BaseModel):
+    active: bool
+    token_type: str | None = None
+    claims: dict | None = None
+    error: str | None = None
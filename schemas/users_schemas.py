@@ -37,3 +37,17 @@ class UserResponse(UserBase):
     updated_at: datetime
     social_accounts: list[UserSocialAccountBase] | None = None
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserPhoneResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: UUID
+    user_id: UUID
+    phone: str
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+
+class VerificationCodeSent(BaseModel):
+    message: str
+    email: str
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+import json
+
+import jwt
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm, RSAAlgorithm
+from jwt.exceptions import InvalidTokenError
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from config import get_settings
+
+settings = get_settings()
+
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+# JSON list of {"kid", "alg", and one of "secret" / "private_key" (PEM) / "private_key_path"}
+JWT_KEYS = settings.jwt_keys
+JWT_ACTIVE_KID = settings.jwt_active_kid
+JWKS_MAX_AGE_SECONDS = settings.jwks_max_age_seconds
+
+DEFAULT_KID = "default"
+HMAC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """A ``kid``-tagged key whose signing/verifying objects are parsed once."""
+
+    kid: str
+    algorithm: str
+    signing_key: Any
+    verifying_key: Any
+
+    @property
+    def is_symmetric(self) -> bool:
+        return self.algorithm in HMAC_ALGORITHMS
+
+    def public_jwk(self) -> Optional[dict]:
+        if self.is_symmetric:
+            return None
+        public_key = self.verifying_key
+        if isinstance(public_key, ec.EllipticCurvePublicKey):
+            jwk = ECAlgorithm.to_jwk(public_key, as_dict=True)
+        elif isinstance(public_key, ed25519.Ed25519PublicKey):
+            jwk = OKPAlgorithm.to_jwk(public_key, as_dict=True)
+        elif isinstance(public_key, rsa.RSAPublicKey):
+            jwk = RSAAlgorithm.to_jwk(public_key, as_dict=True)
+        else:
+            return None
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+    @classmethod
+    def from_secret(cls, kid: str, secret: str | bytes, algorithm: str = "HS256") -> "SigningKey":
+        key = secret.encode() if isinstance(secret, str) else secret
+        return cls(kid=kid, algorithm=algorithm, signing_key=key, verifying_key=key)
+
+    @classmethod
+    def from_private_key(cls, kid: str, private_key: Any, algorithm: str) -> "SigningKey":
+        return cls(kid=kid, algorithm=algorithm, signing_key=private_key, verifying_key=private_key.public_key())
+
+    @classmethod
+    def from_pem(cls, kid: str, pem: str | bytes, algorithm: str) -> "SigningKey":
+        data = pem.encode() if isinstance(pem, str) else pem
+        return cls.from_private_key(kid, serialization.load_pem_private_key(data, password=None), algorithm)
+
+    @classmethod
+    def from_config(cls, entry: dict) -> "SigningKey":
+        kid, algorithm = entry["kid"], entry.get("alg", "HS256")
+        if "secret" in entry:
+            return cls.from_secret(kid, entry["secret"], algorithm)
+        if "private_key_path" in entry:
+            with open(entry["private_key_path"], "rb") as f:
+                return cls.from_pem(kid, f.read(), algorithm)
+        return cls.from_pem(kid, entry["private_key"], algorithm)
+
+
+class KeyRing:
+    """Signs with the active key and verifies with any key in the ring.
+
+    Rotation without downtime: add the new key with :meth:`rotate` (it becomes
+    active), keep the previous one until every token it signed has expired,
+    then :meth:`retire` it. Tokens without a ``kid`` header (issued before the
+    ring existed) verify against the ``default`` key.
+    """
+
+    def __init__(self, keys: list[SigningKey], active_kid: Optional[str] = None):
+        self._keys = {key.kid: key for key in keys}
+        self._active_kid = active_kid or (keys[0].kid if keys else None)
+        if keys and self._active_kid not in self._keys:
+            raise ValueError(f"Unknown active kid: {self._active_kid}")
+        self._jwks: Optional[dict] = None
+
+    @property
+    def active(self) -> SigningKey:
+        if self._active_kid is None:
+            raise RuntimeError("No JWT signing key configured (set SECRET_KEY/ALGORITHM or JWT_KEYS)")
+        return self._keys[self._active_kid]
+
+    def get(self, kid: Optional[str]) -> Optional[SigningKey]:
+        return self._keys.get(kid or DEFAULT_KID)
+
+    def rotate(self, key: SigningKey) -> None:
+        self._keys[key.kid] = key
+        self._active_kid = key.kid
+        self._jwks = None
+
+    def retire(self, kid: str) -> None:
+        if kid == self._active_kid:
+            raise ValueError("Cannot retire the active key")
+        self._keys.pop(kid, None)
+        self._jwks = None
+
+    # ==================== SIGN / VERIFY ====================
+    def encode(self, payload: dict) -> str:
+        key = self.active
+        return jwt.encode(payload, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def decode(self, token: str, **kwargs) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"Unknown signing key: {kid}")
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm], **kwargs)
+
+    # ==================== JWKS ====================
+    def jwks(self) -> dict:
+        """Public keys for asymmetric algorithms; HMAC secrets are never published."""
+        if self._jwks is None:
+            keys = [jwk for jwk in (key.public_jwk() for key in self._keys.values()) if jwk]
+            self._jwks = {"keys": keys}
+        return self._jwks
+
+    @classmethod
+    def from_env(cls) -> "KeyRing":
+        keys = [SigningKey.from_config(entry) for entry in json.loads(JWT_KEYS)] if JWT_KEYS else []
+        if SECRET_KEY and ALGORITHM and not any(key.kid == DEFAULT_KID for key in keys):
+            # Legacy single-secret configuration keeps verifying tokens without a kid
+            keys.append(SigningKey.from_secret(DEFAULT_KID, SECRET_KEY, ALGORITHM))
+        return cls(keys, active_kid=JWT_ACTIVE_KID)
+
+
+key_ring = KeyRing.from_env()
@@ -0,0 +1,49 @@
+from typing import Optional
+
+from models.users_models import User
+from utils.cache_utils import TTLCache
+from config import get_settings
+
+settings = get_settings()
+
+PRINCIPAL_CACHE_SIZE = settings.principal_cache_size
+PRINCIPAL_CACHE_TTL_SECONDS = settings.principal_cache_ttl_seconds
+
+
+class PrincipalCache:
+    """Authenticated users keyed by token subject (email).
+
+    Entries are detached ``User`` instances with ``social_accounts`` already
+    loaded, so handlers can serialize them without a session. Writers must call
+    :meth:`invalidate`; the TTL bounds staleness for changes made by other
+    workers.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self._users = TTLCache(maxsize=maxsize, default_ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        user = self._users.get(subject)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def set(self, subject: str, user: User) -> None:
+        self._users.set(subject, user)
+
+    def invalidate(self, subject: Optional[str]) -> None:
+        if subject:
+            self._users.pop(subject)
+
+    def clear(self) -> None:
+        self._users.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._users)}
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+from hashlib import blake2b
+from threading import Lock
+from typing import Optional
+import math
+
+from sqlalchemy.orm import Session
+
+from models.token_models import TokenBlocklist
+from utils.cache_utils import TTLCache
+from config import get_settings
+
+settings = get_settings()
+
+REVOCATION_FILTER_CAPACITY = settings.revocation_filter_capacity
+REVOCATION_FILTER_ERROR_RATE = settings.revocation_filter_error_rate
+REVOCATION_LRU_SIZE = settings.revocation_lru_size
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter used as a negative membership test."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+
+def _to_epoch(value: datetime) -> float:
+    # Expiries are written as UTC; SQLite hands them back naive
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationCache:
+    """Process-local view of ``token_blocklist``.
+
+    A Bloom filter answers "definitely not revoked" without touching the DB,
+    and a TTL-bounded LRU answers "revoked" for recently seen ``jti``s. Each LRU
+    entry expires together with the token it revokes. Anything else falls
+    through to the database.
+
+    The filter is only trusted once :meth:`warm` has loaded every unexpired
+    row, and stops being trusted once it holds more keys than it was sized
+    for or :meth:`invalidate` is called, until the next :meth:`warm`.
+    Bloom entries cannot be removed, so :meth:`rebuild` periodically reloads
+    the filter from unexpired rows only. Revocations made by other workers
+    arrive through the revocation channel.
+    """
+
+    def __init__(
+        self,
+        capacity: int = REVOCATION_FILTER_CAPACITY,
+        error_rate: float = REVOCATION_FILTER_ERROR_RATE,
+        lru_size: int = REVOCATION_LRU_SIZE,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._revoked = TTLCache(maxsize=lru_size)
+        self._warmed = False
+        # jtis added while a rebuild is reading the table, replayed into the new filter
+        self._added_during_load: Optional[list[str]] = None
+        self._lock = Lock()
+        # One rebuild at a time (startup/resync warm vs. the sweeper's rebuild)
+        self._load_lock = Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def lookup(self, jti: str) -> Optional[bool]:
+        """Return ``True``/``False`` when the answer is known locally, ``None`` otherwise."""
+        revoked = self._revoked.get(jti) is not None
+        with self._lock:
+            if revoked:
+                self.hits += 1
+                return True
+            if self._warmed and not self._filter.saturated and jti not in self._filter:
+                self.negative_hits += 1
+                return False
+            self.misses += 1
+            return None
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        expires = _to_epoch(expires_at)
+        with self._lock:
+            self._filter.add(jti)
+            if self._added_during_load is not None:
+                self._added_during_load.append(jti)
+        self._revoked.set(jti, True, expires_at=expires)
+
+    def invalidate(self) -> None:
+        """Stop answering "not revoked" locally until the next :meth:`warm`."""
+        with self._lock:
+            self._warmed = False
+
+    def _load(self, db: Session, trust: bool) -> int:
+        with self._load_lock:
+            return self._load_locked(db, trust)
+
+    def _load_locked(self, db: Session, trust: bool) -> int:
+        with self._lock:
+            self._added_during_load = []
+        try:
+            now = datetime.now(timezone.utc)
+            rows = (
+                db.query(TokenBlocklist.jti, TokenBlocklist.expires_at)
+                .filter(TokenBlocklist.expires_at > now)
+                .all()
+            )
+            bloom = BloomFilter(max(self.capacity, len(rows) * 2), self.error_rate)
+            for jti, _ in rows:
+                bloom.add(jti)
+        except BaseException:
+            with self._lock:
+                self._added_during_load = None
+            raise
+        with self._lock:
+            for jti in self._added_during_load:
+                bloom.add(jti)
+            self._added_during_load = None
+            self._filter = bloom
+            if trust:
+                self._warmed = True
+        for jti, expires_at in rows[-self._revoked.maxsize:]:
+            self._revoked.set(jti, True, expires_at=_to_epoch(expires_at))
+        return len(rows)
+
+    def warm(self, db: Session) -> int:
+        """Rebuild the filter from every unexpired ``token_blocklist`` row and trust it."""
+        return self._load(db, trust=True)
+
+    def rebuild(self, db: Session) -> int:
+        """Rebuild the filter from unexpired rows, dropping expired jtis, without changing whether it is trusted."""
+        return self._load(db, trust=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "lru_size": len(self._revoked),
+                "filter_count": self._filter.count,
+                "filter_saturated": self._filter.saturated,
+                "warmed": self._warmed,
+            }
+
+
+revocation_cache = RevocationCache()
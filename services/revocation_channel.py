@@ -0,0 +1,251 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import asyncio
+import json
+import logging
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import DATABASE_URL, SessionLocal
+from services.revocation_cache import revocation_cache
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# local: in-process loopback (tests; negatives always go to the DB); postgres: LISTEN/NOTIFY shared by every worker
+REVOCATION_CHANNEL = settings.revocation_channel or ("postgres" if DATABASE_URL.startswith("postgres") else "local")
+REVOCATION_CHANNEL_NAME = settings.revocation_channel_name
+REVOCATION_CHANNEL_RECONNECT_SECONDS = settings.revocation_channel_reconnect_seconds
+
+_PENDING_KEY = "pending_revocations"
+
+RevokedHandler = Callable[[str, datetime], None]
+ResyncHandler = Callable[[], None]
+
+
+def _encode(jti: str, expires_at: datetime) -> str:
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return json.dumps({"jti": jti, "exp": expires_at.timestamp()}, separators=(",", ":"))
+
+
+def _decode(payload: str) -> tuple[str, datetime]:
+    message = json.loads(payload)
+    return message["jti"], datetime.fromtimestamp(message["exp"], tz=timezone.utc)
+
+
+class RevocationChannel(ABC):
+    """Fan-out of committed revocations to every worker's local revocation state.
+
+    :meth:`publish` is called inside the transaction that writes the
+    ``token_blocklist`` row, and subscribers only hear about it once that
+    transaction commits. When a backend may have dropped messages (lost
+    connection) it calls the ``on_gap`` handlers, and the ``on_resync``
+    handlers once it is listening again, so subscribers can reload from the
+    table.
+    """
+
+    def __init__(self):
+        self._on_revoked: list[RevokedHandler] = []
+        self._on_gap: list[ResyncHandler] = []
+        self._on_resync: list[ResyncHandler] = []
+        self.published = 0
+        self.received = 0
+        self.malformed = 0
+
+    def subscribe(
+        self,
+        on_revoked: RevokedHandler,
+        on_gap: Optional[ResyncHandler] = None,
+        on_resync: Optional[ResyncHandler] = None,
+    ) -> None:
+        self._on_revoked.append(on_revoked)
+        if on_gap is not None:
+            self._on_gap.append(on_gap)
+        if on_resync is not None:
+            self._on_resync.append(on_resync)
+
+    @property
+    def connected(self) -> bool:
+        """Whether revocations from other workers are currently being received."""
+        return False
+
+    @abstractmethod
+    async def publish(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """Announce the revocation of ``jti`` when ``db``'s current transaction commits."""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def _deliver(self, jti: str, expires_at: datetime) -> None:
+        self.received += 1
+        for handler in self._on_revoked:
+            handler(jti, expires_at)
+
+    def _receive(self, payload: str) -> None:
+        try:
+            jti, expires_at = _decode(payload)
+        except (ValueError, KeyError, TypeError):
+            self.malformed += 1
+            logger.warning("Ignoring malformed revocation message %r", payload[:200])
+            return
+        self._deliver(jti, expires_at)
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "received": self.received,
+            "malformed": self.malformed,
+            "connected": self.connected,
+        }
+
+
+class LocalRevocationChannel(RevocationChannel):
+    """In-process loopback: delivers to this process's subscribers after commit.
+
+    It never hears about other workers, so it reports itself as not
+    connected: the revocation cache then never answers "not revoked" on its
+    own and every negative falls through to ``token_blocklist``.
+    """
+
+    async def publish(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        db.info.setdefault(_PENDING_KEY, []).append((self, jti, expires_at))
+        self.published += 1
+
+
+# AsyncSession.info is its sync Session's info, so these see what publish() queued
+@event.listens_for(Session, "after_commit")
+def _deliver_pending_revocations(session: Session) -> None:
+    for channel, jti, expires_at in session.info.pop(_PENDING_KEY, ()):
+        channel._deliver(jti, expires_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_revocations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class PostgresRevocationChannel(RevocationChannel):
+    """``NOTIFY`` in the revoking transaction, ``LISTEN`` on a dedicated connection.
+
+    Postgres delivers a notification only if its transaction commits, so the
+    feed never announces a revocation that was rolled back. The listener is
+    one long-lived psycopg connection outside the pool; it reconnects every
+    ``reconnect_seconds`` after a failure and asks subscribers to resync.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = REVOCATION_CHANNEL_NAME,
+        reconnect_seconds: float = REVOCATION_CHANNEL_RECONNECT_SECONDS,
+    ):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.reconnects = 0
+        self._connected = False
+        self._needs_resync = False
+        self._listening: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "PostgresRevocationChannel":
+        # psycopg takes a libpq URL, not SQLAlchemy's "postgresql+psycopg://"
+        return cls(make_url(url).set(drivername="postgresql").render_as_string(hide_password=False), **kwargs)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    async def publish(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        await db.execute(select(func.pg_notify(self.channel, _encode(jti, expires_at))))
+        self.published += 1
+
+    async def _resync(self) -> None:
+        for handler in self._on_resync:
+            await asyncio.to_thread(handler)
+
+    async def _listen(self) -> None:
+        import psycopg
+        from psycopg import sql
+
+        async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+            await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            self._connected = True
+            self._listening.set()
+            if self._needs_resync:
+                # Listening again before reloading, so nothing falls in between
+                await self._resync()
+                self._needs_resync = False
+            async for notify in conn.notifies():
+                self._receive(notify.payload)
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Revocation listener disconnected; retrying in %ss", self.reconnect_seconds)
+            finally:
+                if self._connected:
+                    self.reconnects += 1
+                self._connected = False
+            if not self._needs_resync:
+                self._needs_resync = True
+                for handler in self._on_gap:
+                    handler()
+            self._listening.set()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def start(self) -> None:
+        """Start listening; returns once the first connection attempt succeeded or failed."""
+        if self._task is None:
+            self._listening = asyncio.Event()
+            self._task = asyncio.create_task(self._listen_forever())
+            await self._listening.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {**super().stats(), "reconnects": self.reconnects}
+
+
+def _channel_from_env() -> RevocationChannel:
+    if REVOCATION_CHANNEL == "postgres":
+        return PostgresRevocationChannel.from_url(DATABASE_URL)
+    if REVOCATION_CHANNEL == "local":
+        return LocalRevocationChannel()
+    raise RuntimeError(f"Unknown REVOCATION_CHANNEL {REVOCATION_CHANNEL!r} (expected local or postgres)")
+
+
+def warm_revocation_cache() -> None:
+    with SessionLocal() as db:
+        revocation_cache.warm(db)
+
+
+revocation_channel = _channel_from_env()
+revocation_channel.subscribe(
+    revocation_cache.add,
+    on_gap=revocation_cache.invalidate,
+    on_resync=warm_revocation_cache,
+)
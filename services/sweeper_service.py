@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from typing import Optional
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import delete, func, select
+
+from config import get_settings
+from database import AsyncSessionLocal, SessionLocal
+from models.code_validation_models import PhoneEmailVerificationCode
+from models.token_models import TokenBlocklist
+from models.rate_limit_models import RateLimitBucket
+from services.revocation_cache import RevocationCache, revocation_cache
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SWEEPER_ENABLED = settings.sweeper_enabled
+SWEEPER_INTERVAL_SECONDS = settings.sweeper_interval_seconds
+SWEEPER_BATCH_SIZE = settings.sweeper_batch_size
+SWEEPER_BATCH_PAUSE_SECONDS = settings.sweeper_batch_pause_seconds
+
+
+class ExpirySweeper:
+    """Deletes expired ``token_blocklist`` rows and verification codes, and refilled rate-limit buckets.
+
+    Rows are removed in batches of ``batch_size`` selected through the
+    ``expires_at`` indexes, each batch in its own short transaction, with a
+    pause in between so writers are never blocked for long.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = SWEEPER_BATCH_SIZE,
+        pause_seconds: float = SWEEPER_BATCH_PAUSE_SECONDS,
+        interval_seconds: float = SWEEPER_INTERVAL_SECONDS,
+        session_factory=AsyncSessionLocal,
+        revocation_cache: Optional[RevocationCache] = revocation_cache,
+    ):
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.interval_seconds = interval_seconds
+        self.session_factory = session_factory
+        self.revocation_cache = revocation_cache
+        self.rows_purged = {
+            TokenBlocklist.__tablename__: 0,
+            PhoneEmailVerificationCode.__tablename__: 0,
+            RateLimitBucket.__tablename__: 0,
+        }
+        self.table_sizes: dict[str, int] = {}
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _targets(now: datetime):
+        yield TokenBlocklist, TokenBlocklist.expires_at < now
+        # Used codes go too once they expire (within PHONE_EMAIL_CODE_EXPIRE_MINUTES); an OR on
+        # used_at could not be served by idx_verification_expires_at
+        yield PhoneEmailVerificationCode, PhoneEmailVerificationCode.expires_at < now
+        # A bucket past full_at is back to capacity, the same as having no row
+        yield RateLimitBucket, RateLimitBucket.full_at < now.timestamp()
+
+    async def _purge(self, model, condition) -> int:
+        purged = 0
+        while True:
+            batch = select(model.id).where(condition).limit(self.batch_size).scalar_subquery()
+            async with self.session_factory() as db:
+                result = await db.execute(delete(model).where(model.id.in_(batch)))
+                await db.commit()
+            purged += result.rowcount or 0
+            if (result.rowcount or 0) < self.batch_size:
+                return purged
+            await asyncio.sleep(self.pause_seconds)
+
+    async def _measure(self, model) -> int:
+        async with self.session_factory() as db:
+            return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+    async def sweep_once(self) -> dict[str, int]:
+        now = datetime.now(timezone.utc)
+        purged = {}
+        for model, condition in self._targets(now):
+            table = model.__tablename__
+            purged[table] = await self._purge(model, condition)
+            self.rows_purged[table] += purged[table]
+            self.table_sizes[table] = await self._measure(model)
+        self.runs += 1
+        self.last_run_at = now
+        logger.info("expiry sweep purged=%s sizes=%s", purged, self.table_sizes)
+        return purged
+
+    def _rebuild_revocation_filter(self) -> None:
+        with SessionLocal() as db:
+            self.revocation_cache.rebuild(db)
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+                if self.revocation_cache is not None:
+                    # Bloom entries never expire: reload the filter from the rows that are left
+                    await asyncio.to_thread(self._rebuild_revocation_filter)
+            except Exception:
+                logger.exception("expiry sweep failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "rows_purged": dict(self.rows_purged),
+            "table_sizes": dict(self.table_sizes),
+        }
+
+
+expiry_sweeper = ExpirySweeper()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge expired token_blocklist rows and verification codes, and refilled rate-limit buckets.")
+    parser.add_argument("--once", action="store_true", help="run a single sweep and exit")
+    parser.add_argument("--batch-size", type=int, default=SWEEPER_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=SWEEPER_BATCH_PAUSE_SECONDS)
+    parser.add_argument("--interval", type=float, default=SWEEPER_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # A standalone process has no revocation cache worth rebuilding
+    sweeper = ExpirySweeper(
+        batch_size=args.batch_size,
+        pause_seconds=args.pause,
+        interval_seconds=args.interval,
+        revocation_cache=None,
+    )
+    asyncio.run(sweeper.sweep_once() if args.once else sweeper.run_forever())
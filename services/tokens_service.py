@@ -1,29 +1,31 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Iterable, Optional
 from uuid import UUID
 
-import os
 import uuid
-import jwt
 from jwt.exceptions import InvalidTokenError
-from dotenv import load_dotenv
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, String, Uuid, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import dialect_insert, get_async_db
 from models.token_models import TokenBlocklist, TokenType
+from models.users_models import User
+from services.revocation_cache import revocation_cache
+from services.revocation_channel import revocation_channel
+from services.key_ring import KeyRing, key_ring
+from schemas.tokens_schemas import IntrospectionResult
+from utils.metrics import jwt_operation_seconds
+from config import get_settings
 
-load_dotenv()
+settings = get_settings()
 
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-EMAIL_TOKEN_EXPIRE_MINUTES = int(os.getenv("EMAIL_TOKEN_EXPIRE_MINUTES", "5"))
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+EMAIL_TOKEN_EXPIRE_MINUTES = settings.email_token_expire_minutes
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+REFRESH_TOKEN_EXPIRE_DAYS = settings.refresh_token_expire_days
 
 
 class TokenPair(BaseModel):
@@ -39,21 +41,27 @@ bearer_scheme = HTTPBearer(
 
 
 class TokenService:
-    def __init__(self, db: Depends(get_db)):
+    def __init__(self, db: AsyncSession, keys: KeyRing = key_ring):
         self.db = db
-        self.sercret = SECRET_KEY
-        self.algorithm = ALGORITHM
+        self.keys = keys
 
     # ==================== DB-RELATED METHODS ====================
-    def is_blacklisted(self, jti: str) -> bool:
-        return (
-            self.db.query(TokenBlocklist)
-            .filter(TokenBlocklist.jti == jti)
-            .first()
-            is not None
-        )
-
-    def blacklist_token(
+    async def _get_blocklist_entry(self, jti: str) -> Optional[TokenBlocklist]:
+        result = await self.db.execute(select(TokenBlocklist).where(TokenBlocklist.jti == jti))
+        return result.scalars().first()
+
+    async def is_blacklisted(self, jti: str) -> bool:
+        cached = revocation_cache.lookup(jti)
+        if cached is not None:
+            return cached
+
+        entry = await self._get_blocklist_entry(jti)
+        if entry is None:
+            return False
+        revocation_cache.add(jti, entry.expires_at)
+        return True
+
+    async def blacklist_token(
         self,
         *,
         jti: str,
@@ -61,25 +69,51 @@ class TokenService:
         user_id: Optional[UUID],
         expires_at: datetime,
         reason: Optional[str] = None,
-    ) -> TokenBlocklist:
-        if self.is_blacklisted(jti):
-            return (
-                self.db.query(TokenBlocklist)
-                .filter(TokenBlocklist.jti == jti)
-                .first()
+    ) -> bool:
+        """Revoke ``jti``; returns False when it was already revoked.
+
+        ``ON CONFLICT (jti) DO NOTHING`` makes the write idempotent without a
+        prior SELECT: the revocation cache's "not revoked" may lag behind
+        another worker's commit, so it cannot decide whether the row exists.
+        """
+        stmt = (
+            dialect_insert(self.db.bind)(TokenBlocklist)
+            .values(
+                id=uuid.uuid4(),
+                jti=jti,
+                token_type=token_type.value if hasattr(token_type, "value") else str(token_type),
+                user_id=user_id,
+                expires_at=expires_at,
+                reason=reason,
             )
-
-        entry = TokenBlocklist(
-            jti=jti,
-            token_type=token_type.value if hasattr(token_type, "value") else str(token_type),
-            user_id=user_id,
-            expires_at=expires_at,
-            reason=reason,
+            .on_conflict_do_nothing(index_elements=[TokenBlocklist.jti])
+            .returning(TokenBlocklist.id)
         )
-        self.db.add(entry)
-        self.db.commit()
-        self.db.refresh(entry)
-        return entry
+        inserted = (await self.db.execute(stmt)).first() is not None
+        if inserted:
+            await revocation_channel.publish(self.db, jti, expires_at)
+        await self.db.commit()
+        revocation_cache.add(jti, expires_at)
+        return inserted
+
+    async def blacklisted_jtis(self, jtis: Iterable[str]) -> set[str]:
+        """Return the revoked subset of ``jtis`` with at most one ``IN`` query."""
+        revoked, unknown = set(), set()
+        for jti in set(jtis):
+            cached = revocation_cache.lookup(jti)
+            if cached is None:
+                unknown.add(jti)
+            elif cached:
+                revoked.add(jti)
+
+        if unknown:
+            result = await self.db.execute(
+                select(TokenBlocklist.jti, TokenBlocklist.expires_at).where(TokenBlocklist.jti.in_(unknown))
+            )
+            for jti, expires_at in result.all():
+                revocation_cache.add(jti, expires_at)
+                revoked.add(jti)
+        return revoked
 
     # ==================== JWT HELPERS ====================
     @staticmethod
@@ -90,30 +124,38 @@ class TokenService:
         to_encode.update({"exp": expire, "type": token_type, "jti": jti})
         return to_encode
 
+    def _encode(self, payload: dict) -> str:
+        with jwt_operation_seconds.time("encode"):
+            return self.keys.encode(payload)
+
+    def _decode(self, token: str) -> dict:
+        with jwt_operation_seconds.time("decode"):
+            return self.keys.decode(token)
+
     # ==================== TOKEN CREATION ====================
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         if expires_delta is None:
             expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         to_encode = self._with_standard_claims(data, token_type="access", exp_delta=expires_delta)
-        return jwt.encode(to_encode, self.sercret, algorithm=self.algorithm)
+        return self._encode(to_encode)
 
     def create_refresh_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         if expires_delta is None:
             expires_delta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         to_encode = self._with_standard_claims(data, token_type="refresh", exp_delta=expires_delta)
-        return jwt.encode(to_encode, self.sercret, algorithm=self.algorithm)
+        return self._encode(to_encode)
 
     def create_email_verification_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         if expires_delta is None:
             expires_delta = timedelta(minutes=EMAIL_TOKEN_EXPIRE_MINUTES)
         to_encode = self._with_standard_claims(data, token_type="email_verified", exp_delta=expires_delta)
-        return jwt.encode(to_encode, self.sercret, algorithm=self.algorithm)
+        return self._encode(to_encode)
 
 
     # ==================== TOKEN VALIDATION ====================
     def validate_access_token(self, token_str: str) -> dict:
         try:
-            payload = jwt.decode(token_str, self.sercret, algorithms=[self.algorithm])
+            payload = self._decode(token_str)
             if payload.get("type") != "access":
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -125,7 +167,7 @@ class TokenService:
 
     def validate_email_verified_token(self, token_str: str) -> dict:
         try:
-            payload = jwt.decode(token_str, self.sercret, algorithms=[self.algorithm])
+            payload = self._decode(token_str)
             if payload.get("type") != "email_verified":
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -135,23 +177,108 @@ class TokenService:
         except InvalidTokenError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    def validate_refresh_token(self, refresh_token: str) -> dict:
+    async def validate_refresh_token(self, refresh_token: str) -> dict:
         try:
-            payload = jwt.decode(refresh_token, self.sercret, algorithms=[self.algorithm])
+            payload = self._decode(refresh_token)
             if payload.get("type") != "refresh":
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail=f"Invalid token type: {payload.get('token_type')}",
                 )
             jti = payload.get("jti")
-            if jti and self.is_blacklisted(jti):
+            if jti and await self.is_blacklisted(jti):
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
             return payload
         except InvalidTokenError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
 
-def get_token_service(db: Session = Depends(get_db)) -> TokenService:
+    # ==================== REFRESH ROTATION ====================
+    async def rotate_refresh_token(self, refresh_token: str) -> TokenPair:
+        """Revoke ``refresh_token`` and issue a new pair in a single statement.
+
+        ``INSERT INTO token_blocklist ... SELECT ... FROM users WHERE email = :sub
+        ON CONFLICT (jti) DO NOTHING RETURNING user_id`` checks the subject,
+        records the rotation and detects replay at once. Only the caller that
+        actually inserts the jti gets a row back, so two concurrent refreshes
+        with the same token cannot both succeed.
+        """
+        try:
+            payload = self._decode(refresh_token)
+        except InvalidTokenError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        if payload.get("type") != "refresh" or not payload.get("jti"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid token type: {payload.get('type')}",
+            )
+
+        jti, email = payload["jti"], payload.get("sub")
+        if revocation_cache.lookup(jti):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        source = select(
+            literal(uuid.uuid4(), Uuid()),
+            literal(jti, String()),
+            literal(TokenType.REFRESH.value, String()),
+            User.id,
+            literal(expires_at, DateTime(timezone=True)),
+            literal("rotated", String()),
+        ).where(User.email == email)
+        stmt = (
+            dialect_insert(self.db.bind)(TokenBlocklist)
+            .from_select(["id", "jti", "token_type", "user_id", "expires_at", "reason"], source)
+            .on_conflict_do_nothing(index_elements=[TokenBlocklist.jti])
+            .returning(TokenBlocklist.user_id)
+        )
+        inserted = (await self.db.execute(stmt)).first()
+        if inserted is not None:
+            await revocation_channel.publish(self.db, jti, expires_at)
+        await self.db.commit()
+
+        if inserted is None:
+            # Slow path only: tell a replayed token apart from an unknown subject
+            if await self._get_blocklist_entry(jti) is not None:
+                revocation_cache.add(jti, expires_at)
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
+
+        revocation_cache.add(jti, expires_at)
+        return self._issue_token_pair(email)
+
+    def _issue_token_pair(self, email: str) -> TokenPair:
+        data = {"sub": email}
+        return TokenPair(
+            access_token=self.create_access_token(data=data),
+            refresh_token=self.create_refresh_token(data=data),
+            token_type="bearer",
+        )
+
+    # ==================== INTROSPECTION ====================
+    async def introspect_tokens(self, tokens: list[str]) -> list[IntrospectionResult]:
+        """Verify a batch of tokens in one pass and check every jti with a single query."""
+        payloads: list[Optional[dict]] = []
+        results: list[IntrospectionResult] = []
+        for token in tokens:
+            try:
+                payload = self._decode(token)
+            except InvalidTokenError as e:
+                payloads.append(None)
+                results.append(IntrospectionResult(active=False, error=str(e) or "Invalid token"))
+                continue
+            payloads.append(payload)
+            results.append(IntrospectionResult(active=True, token_type=payload.get("type"), claims=payload))
+
+        revoked = await self.blacklisted_jtis(p["jti"] for p in payloads if p and p.get("jti"))
+        for payload, result in zip(payloads, results):
+            if payload and payload.get("jti") in revoked:
+                result.active = False
+                result.error = "Token revoked"
+        return results
+
+
+def get_token_service(db: AsyncSession = Depends(get_async_db)) -> TokenService:
     return TokenService(db)
 
 
@@ -163,11 +290,11 @@ def get_access_payload(
     return token_service.validate_access_token(credentials.credentials)
 
 
-def get_refresh_payload(
+async def get_refresh_payload(
     refresh_token: str,
     token_service: TokenService = Depends(get_token_service),
 ):
-    return token_service.validate_refresh_token(refresh_token)
+    return await token_service.validate_refresh_token(refresh_token)
 
 
 def get_email_verification_payload(
@@ -1,135 +1,248 @@
 from schemas.users_schemas import UserUpdate
 from fastapi import Depends
-from database import get_db
+from database import dialect_insert, get_async_db
 from models.users_models import User, UserRole, UserSocialAccount, UserPhone
-from sqlalchemy.orm import Session
+from sqlalchemy import String, and_, func, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from models.users_models import AuthProviderType
 from uuid import UUID
+from typing import AsyncIterator, Optional
 from services.tokens_service import get_token_service, TokenService
+from services.principal_cache import principal_cache
 from datetime import timedelta
-import os
-from dotenv import load_dotenv
-from utils.email_utlis import send_phone_number_verification_email_utils
 from models.code_validation_models import PhoneEmailVerificationCode
+from utils.phone_utils import normalize_phone_number
+from config import get_settings
 from datetime import datetime, timezone
-import random
+import hashlib
+import hmac
+import secrets
+import uuid
 
-load_dotenv()
+settings = get_settings()
 
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
-PHONE_EMAIL_CODE_EXPIRE_MINUTES = int(os.getenv("PHONE_EMAIL_CODE_EXPIRE_MINUTES", "10"))
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+PHONE_EMAIL_CODE_EXPIRE_MINUTES = settings.phone_email_code_expire_minutes
+PHONE_EMAIL_CODE_MAX_ATTEMPTS = settings.phone_email_code_max_attempts
+
+
+def verification_code_key() -> bytes:
+    """Key for hashing stored verification codes (falls back to the JWT secret)."""
+    key = settings.verification_code_hmac_key or settings.secret_key
+    if not key:
+        # 6-digit codes hashed with a known key are brute-forced from a DB dump in a million HMACs
+        raise RuntimeError("No verification code key configured (set VERIFICATION_CODE_HMAC_KEY or SECRET_KEY)")
+    return key.encode()
+
+
+def _hash_verification_code(email: str, phone_number: str, code: str) -> str:
+    message = f"{email}\x00{phone_number}\x00{code}".encode()
+    return hmac.new(verification_code_key(), message, hashlib.sha256).hexdigest()
+
+# ==================== LOADER STRATEGIES ====================
+# Every read states what it loads, so serializing the result never lazy loads
+# (async sessions cannot, and DB_RAISELOAD=true turns any attempt into an error).
+
+# UserResponse (social_accounts): user query + one selectin query for the whole batch
+USER_RESPONSE_LOAD = (selectinload(User.social_accounts),)
+# Callers that only read columns (ids, email, role): a single query
+USER_COLUMNS_LOAD = (raiseload("*"),)
+# Phone lookups: phones and social accounts joined into the user query
+USER_PROFILE_LOAD = (joinedload(User.phones), joinedload(User.social_accounts))
 
 class UserService:
     """Service class for user CRUD operations and business logic"""
     
-    def __init__(self, db: Depends(get_db)):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.token_service: TokenService = get_token_service(db)
 
+    async def _first_user(self, *criteria, load=USER_RESPONSE_LOAD):
+        result = await self.db.execute(select(User).options(*load).where(*criteria))
+        return result.unique().scalars().first()
+
+    async def _reload(self, user: User) -> User:
+        """Re-read a user after commit so server-side defaults and relationships are loaded."""
+        result = await self.db.execute(
+            select(User)
+            .options(*USER_RESPONSE_LOAD)
+            .where(User.id == user.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one()
+
     # ==================== USER METHODS ====================
 
-    def create_user(self, user: User):
+    async def create_user(self, user: User):
 
-        exists_user = self.get_user_by_email(user.email)
+        exists_user = await self.get_user_by_email(user.email)
         if exists_user:
             return exists_user
 
         self.db.add(user)
-        self.db.commit()
-        return user
+        await self.db.commit()
+        return await self._reload(user)
 
-    def get_user(self, user_id: UUID):
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_user(self, user_id: UUID, *, load=USER_RESPONSE_LOAD):
+        return await self._first_user(User.id == user_id, load=load)
     
-    def get_user_by_email(self, email: str):
-        return self.db.query(User).filter(User.email == email).first()
-
-    def get_user_by_phone_number(self, phone_number: str):
-        return (
-            self.db.query(User)
-            .filter(User.phones.any(UserPhone.phone == phone_number))
-            .first()
+    async def get_user_by_email(self, email: str, *, load=USER_RESPONSE_LOAD):
+        return await self._first_user(User.email == email, load=load)
+
+    async def get_user_by_phone_number(self, phone_number: str):
+        # Join driven by the user_phones.phone unique index (instead of a correlated
+        # EXISTS); phones and social accounts come back in the same query.
+        result = await self.db.execute(
+            select(User)
+            .join(UserPhone, UserPhone.user_id == User.id)
+            .where(UserPhone.phone == normalize_phone_number(phone_number))
+            .options(*USER_PROFILE_LOAD)
         )
+        return result.unique().scalars().first()
+
+    # ==================== LISTING (KEYSET PAGINATION) ====================
+
+    async def _keyset_page(self, stmt, model, limit: int, after: Optional[tuple[datetime, UUID]]):
+        """Return ``(rows, next_after)`` ordered by ``(created_at, id)``."""
+        if after is not None:
+            created_at, row_id = after
+            if self.db.bind.dialect.name == "sqlite":
+                # SQLite keeps server-default timestamps as "YYYY-MM-DD HH:MM:SS" text while bound
+                # datetimes render with ".ffffff"; compare against the stored form so ties stay ties
+                fmt = "%Y-%m-%d %H:%M:%S.%f" if created_at.microsecond else "%Y-%m-%d %H:%M:%S"
+                created_at = literal(created_at.replace(tzinfo=None).strftime(fmt), String())
+            stmt = stmt.where(
+                or_(
+                    model.created_at > created_at,
+                    and_(model.created_at == created_at, model.id > row_id),
+                )
+            )
+        result = await self.db.execute(stmt.order_by(model.created_at, model.id).limit(limit + 1))
+        rows = result.scalars().all()
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        return rows[:limit], (last.created_at, last.id)
+
+    async def get_users_page(self, limit: int, after: Optional[tuple[datetime, UUID]] = None):
+        stmt = select(User).options(*USER_RESPONSE_LOAD).where(User.disabled == False)
+        return await self._keyset_page(stmt, User, limit, after)
+
+    async def get_phone_numbers_page(self, limit: int, after: Optional[tuple[datetime, UUID]] = None):
+        return await self._keyset_page(select(UserPhone), UserPhone, limit, after)
+
+    async def stream_users(self, batch_size: int = 500) -> AsyncIterator[User]:
+        """Yield every enabled user with server-side batching (constant memory)."""
+        stmt = (
+            select(User)
+            .options(*USER_RESPONSE_LOAD)
+            .where(User.disabled == False)
+            .order_by(User.created_at, User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for user in result.scalars():
+            yield user
+            # Drop yielded rows from the identity map so memory stays flat
+            self.db.expunge(user)
+
+    async def stream_phone_numbers(self, batch_size: int = 500) -> AsyncIterator[UserPhone]:
+        stmt = (
+            select(UserPhone)
+            .order_by(UserPhone.created_at, UserPhone.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for phone in result.scalars():
+            yield phone
+            self.db.expunge(phone)
 
-    def get_all_users(self):
-        return self.db.query(User).filter(User.disabled == False).all()
-
-    def get_all_phone_numbers(self):
-        return self.db.query(UserPhone).all()
+    async def update_user(self, user: User, user_update: UserUpdate):
+        # Principals served from the cache are detached; never mutate the shared instance
+        if user not in self.db:
+            user = await self.db.merge(user)
 
-    def update_user(self, user: User, user_update: UserUpdate):
         user_update = user_update.model_dump(exclude_unset=True)
         for key, value in user_update.items():
             setattr(user, key, value)
 
-        self.db.commit()
-        self.db.refresh(user)
-
-        return user
+        await self.db.commit()
+        principal_cache.invalidate(user.email)
+        return await self._reload(user)
 
-    def delete_user(self, user: User):
-        self.db.delete(user)
-        self.db.commit()
+    async def delete_user(self, user: User):
+        await self.db.delete(user)
+        await self.db.commit()
+        principal_cache.invalidate(user.email)
         return user
 
     def get_user_social_accounts(self, user: User):
         return user.social_accounts
 
-    def get_user_social_account(self, provider_id: str):
-        return self.db.query(UserSocialAccount).filter(UserSocialAccount.provider_id == provider_id).first()
+    async def get_user_social_account(self, provider_id: str):
+        result = await self.db.execute(
+            select(UserSocialAccount).where(UserSocialAccount.provider_id == provider_id)
+        )
+        return result.scalars().first()
 
-    def make_user_admin(self, user: User):
+    async def make_user_admin(self, user: User):
         user.role = UserRole.ADMIN
-        self.db.commit()
-        self.db.refresh(user)
-        return user
-
-    def _create_user_social_account(self, user_social_account: UserSocialAccount):
-        self.db.add(user_social_account)
-        self.db.commit()
-        self.db.refresh(user_social_account)
-        return user_social_account
-
-    def process_google_login(self, user_info: dict):
-
-        user = self.get_user_by_email(user_info['email'])
-        if not user:
-            user = User(
-                email=user_info['email'],
-                full_name=user_info['name'],
-                given_name=user_info['given_name'],
-                family_name=user_info['family_name'],
-                picture=user_info['picture'],
-            )
-            self.create_user(user)
-        else:
-            user_update = UserUpdate(
-                full_name=user.full_name or user_info['name'] ,
-                given_name=user.given_name or user_info['given_name'] ,
-                family_name=user.family_name or user_info['family_name'] ,
-                picture=user.picture or user_info['picture'],
-            )
-            self.update_user(user, user_update)
-
-        user_social_account = self.get_user_social_account(user_info['sub'])
-        if not user_social_account:
-            user_social_account = UserSocialAccount(
-                user_id=user.id,
-                provider=AuthProviderType.GOOGLE,
-                provider_id=user_info['sub'],
-                email=user_info['email'],
-                is_verified=user_info['email_verified'],
-                name=user_info['name'],
-                given_name=user_info['given_name'],
-                family_name=user_info['family_name'],
-                picture=user_info['picture'],
-            )
-            self._create_user_social_account(user_social_account)
-            
-        else:
-            user_social_account.update_last_used()
-            self.db.commit()
-
+        await self.db.commit()
+        principal_cache.invalidate(user.email)
+        return await self._reload(user)
+
+    async def process_google_login(self, user_info: dict):
+        """
+        Upsert the user and the Google social account as one unit of work.
+
+        The user insert fills in profile fields that are still empty and
+        returns the id whether the row was created or already existed. The
+        social account insert refreshes ``last_used`` on conflict. Both set
+        ``updated_at`` themselves: the column's ``onupdate`` only fires for
+        ORM updates, not for ``ON CONFLICT DO UPDATE``. Two statements and a
+        single commit, with no prior SELECTs.
+        """
+        insert = dialect_insert(self.db.bind)
+        user_stmt = insert(User).values(
+            id=uuid.uuid4(),
+            email=user_info['email'],
+            full_name=user_info['name'],
+            given_name=user_info['given_name'],
+            family_name=user_info['family_name'],
+            picture=user_info['picture'],
+        )
+        user_stmt = user_stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={
+                **{
+                    column: func.coalesce(getattr(User, column), getattr(user_stmt.excluded, column))
+                    for column in ("full_name", "given_name", "family_name", "picture")
+                },
+                "updated_at": func.now(),
+            },
+        ).returning(User.id)
+        user_id = (await self.db.execute(user_stmt)).scalar_one()
+
+        social_stmt = insert(UserSocialAccount).values(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            provider=AuthProviderType.GOOGLE.value,
+            provider_id=user_info['sub'],
+            email=user_info['email'],
+            is_verified=user_info['email_verified'],
+            name=user_info['name'],
+            given_name=user_info['given_name'],
+            family_name=user_info['family_name'],
+            picture=user_info['picture'],
+        )
+        social_stmt = social_stmt.on_conflict_do_update(
+            index_elements=[UserSocialAccount.provider, UserSocialAccount.provider_id],
+            set_={"last_used": func.now(), "updated_at": func.now()},
+        )
+        await self.db.execute(social_stmt)
+        await self.db.commit()
+        principal_cache.invalidate(user_info['email'])
 
         # Create new app access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -139,84 +252,97 @@ class UserService:
         refresh_token = self.token_service.create_refresh_token(data={"sub": user_info['email']})
         return access_token, refresh_token
 
-    def get_phone_number_verification_email_code(self, phone_number: str, email: str) -> str:
+    async def get_phone_number_verification_email_code(self, phone_number: str, email: str) -> str:
+        phone_number = normalize_phone_number(phone_number)
         # Generate a 6-digit numeric code
-        code = f"{random.randint(0, 999999):06d}"
+        code = f"{secrets.randbelow(1_000_000):06d}"
 
         created_at = datetime.now(timezone.utc)
         expires_at = created_at + timedelta(minutes=PHONE_EMAIL_CODE_EXPIRE_MINUTES)
 
-        # Persist the verification record
+        # Persist the verification record; only the hash is stored
         verification = PhoneEmailVerificationCode(
             email=email,
             phone_number=phone_number,
-            code=code,
+            code_hash=_hash_verification_code(email, phone_number, code),
             created_at=created_at,
             expires_at=expires_at,
         )
         self.db.add(verification)
-        self.db.commit()
+        await self.db.commit()
 
-        # Send the code via email
-        send_phone_number_verification_email_utils(email, code)
+        # The caller is responsible for sending the code (the route does it in the background)
         return code
 
-
-    def validate_phone_number_verification_code(self, email: str, phone_number: str, code: str) -> dict:
-        now = datetime.now(timezone.utc)
-        verification = (
-            self.db.query(PhoneEmailVerificationCode)
-            .filter(
-                PhoneEmailVerificationCode.email == email,
-                PhoneEmailVerificationCode.phone_number == phone_number,
-                PhoneEmailVerificationCode.code == code,
-                PhoneEmailVerificationCode.expires_at > now,
-                PhoneEmailVerificationCode.used_at.is_(None),
-            )
-            .order_by(PhoneEmailVerificationCode.created_at.desc())
-            .first()
+    async def _consume_verification_code(self, email: str, phone_number: str, code: str, now: datetime) -> bool:
+        """
+        Mark the matching active code as used in one ``UPDATE ... RETURNING``.
+
+        The ``used_at IS NULL`` guard makes it single-use under concurrency:
+        a second verify of the same code matches no row. A miss counts as a
+        failed attempt against every active code for this email and phone.
+        """
+        active = and_(
+            PhoneEmailVerificationCode.email == email,
+            PhoneEmailVerificationCode.phone_number == phone_number,
+            PhoneEmailVerificationCode.used_at.is_(None),
+            PhoneEmailVerificationCode.expires_at > now,
+            PhoneEmailVerificationCode.attempts < PHONE_EMAIL_CODE_MAX_ATTEMPTS,
+        )
+        result = await self.db.execute(
+            update(PhoneEmailVerificationCode)
+            .where(active, PhoneEmailVerificationCode.code_hash == _hash_verification_code(email, phone_number, code))
+            .values(used_at=now)
+            .returning(PhoneEmailVerificationCode.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.first() is not None:
+            return True
+
+        await self.db.execute(
+            update(PhoneEmailVerificationCode)
+            .where(active)
+            .values(attempts=PhoneEmailVerificationCode.attempts + 1)
+            .execution_options(synchronize_session=False)
         )
+        await self.db.commit()
+        return False
 
-        if not verification:
+    async def validate_phone_number_verification_code(self, email: str, phone_number: str, code: str) -> dict:
+        phone_number = normalize_phone_number(phone_number)
+        now = datetime.now(timezone.utc)
+        if not await self._consume_verification_code(email, phone_number, code, now):
             return {"error": "Invalid or expired code"}
-        
-        user_service = UserService(self.db)
-        user = user_service.get_user_by_email(email)
+
+        # The consumed code is committed together with the first write below
+        user = await self.get_user_by_email(email)
         if not user:
             user = User(email=email)
-            user = user_service.create_user(user)
+            user = await self.create_user(user)
 
         # Check if the phone already exists
-        existing_phone = (
-            self.db.query(UserPhone)
-            .filter(UserPhone.phone == phone_number)
-            .first()
-        )
+        result = await self.db.execute(select(UserPhone).where(UserPhone.phone == phone_number))
+        existing_phone = result.scalars().first()
 
         if existing_phone:
             # If it already belongs to the same user, ensure it's verified
             if existing_phone.user_id == user.id:
-                if not existing_phone.is_verified:
-                    existing_phone.is_verified = True
-                    self.db.commit()
-                    self.db.refresh(existing_phone)
+                existing_phone.is_verified = True
+                await self.db.commit()
                 return user
             # If it belongs to another user, do not reassign to avoid UNIQUE violations
+            await self.db.commit()
             return {"error": "Phone number already in use by another user"}
 
         # Create a phone number for the user if it does not exist yet
         new_phone = UserPhone(phone=phone_number, user_id=user.id, is_verified=True)
         self.db.add(new_phone)
-
-        # mark verification as used
-        verification.used_at = now
-        self.db.commit()
-        self.db.refresh(new_phone)
+        await self.db.commit()
 
         return user
 
 # ==================== DEPENDENCY INJECTION ====================
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
+def get_user_service(db: AsyncSession = Depends(get_async_db)) -> UserService:
     """Dependency injection for UserService"""
-    return UserService(db)
\ No newline at end of file
+    return UserService(db)
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Settings are read at import time: configure a throwaway database before any app module loads
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}",
+    SECRET_KEY="test-secret-key-0123456789abcdef0123456789",
+    ALGORITHM="HS256",
+    RATE_LIMIT_ENABLED="false",
+    SWEEPER_ENABLED="false",
+    METRICS_ENABLED="false",
+)
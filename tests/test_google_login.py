@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+
+from database import AsyncSessionLocal, SessionLocal, create_db_and_tables
+from models.users_models import User, UserSocialAccount
+from services.users_services import UserService
+
+LONG_AGO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def _user_info(email: str) -> dict:
+    return {
+        "email": email,
+        "sub": f"google-{email}",
+        "email_verified": True,
+        "name": "Ada Lovelace",
+        "given_name": "Ada",
+        "family_name": "Lovelace",
+        "picture": None,
+    }
+
+
+async def test_repeat_login_bumps_updated_at():
+    create_db_and_tables()
+    info = _user_info("google-login@example.com")
+    async with AsyncSessionLocal() as db:
+        await UserService(db).process_google_login(info)
+
+    with SessionLocal() as db:
+        db.execute(update(User).values(updated_at=LONG_AGO))
+        db.execute(update(UserSocialAccount).values(updated_at=LONG_AGO))
+        db.commit()
+
+    async with AsyncSessionLocal() as db:
+        await UserService(db).process_google_login(info)
+
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == info["email"]).one()
+        account = db.query(UserSocialAccount).filter(UserSocialAccount.user_id == user.id).one()
+        assert user.updated_at.replace(tzinfo=timezone.utc) > LONG_AGO
+        assert account.updated_at.replace(tzinfo=timezone.utc) > LONG_AGO
@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import routes.auth_routes as auth_routes
+from main import app
+from services.tokens_service import TokenService
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def access_token():
+    return TokenService(None).create_access_token({"sub": "someone@example.com"})
+
+
+def test_disabled_without_a_configured_key(client, access_token, monkeypatch):
+    monkeypatch.setattr(auth_routes, "INTROSPECTION_API_KEY", None)
+    response = client.post("/auth/introspect", json={"tokens": [access_token]})
+    assert response.status_code == 404
+
+
+def test_requires_the_configured_key(client, access_token, monkeypatch):
+    monkeypatch.setattr(auth_routes, "INTROSPECTION_API_KEY", "gateway-key")
+    body = {"tokens": [access_token, "not-a-jwt"]}
+    assert client.post("/auth/introspect", json=body).status_code == 401
+    assert client.post("/auth/introspect", json=body, headers={"X-Introspection-Key": "wrong"}).status_code == 401
+
+    response = client.post("/auth/introspect", json=body, headers={"X-Introspection-Key": "gateway-key"})
+    assert response.status_code == 200
+    active, invalid = response.json()
+    assert active["active"] and active["claims"]["sub"] == "someone@example.com"
+    assert not invalid["active"]
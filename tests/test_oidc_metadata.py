@@ -0,0 +1,120 @@
+import json
+import logging
+import time
+
+import httpx
+import pytest
+from authlib.integrations.starlette_client import OAuth
+
+from utils.auth_google_utils import OIDCMetadataCache
+
+METADATA_URL = "https://oidc.test/.well-known/openid-configuration"
+METADATA = {"issuer": "https://oidc.test", "jwks_uri": "https://oidc.test/jwks"}
+JWKS = {"keys": [{"kty": "RSA", "kid": "k1", "n": "AQAB", "e": "AQAB"}]}
+
+
+class FakeOIDCServer:
+    """Serves discovery metadata and JWKS through ``httpx.MockTransport``, counting requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.down = False
+        self.transport = httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.down:
+            return httpx.Response(503)
+        if str(request.url) == METADATA_URL:
+            return httpx.Response(200, json=METADATA)
+        if str(request.url) == METADATA["jwks_uri"]:
+            return httpx.Response(200, json=JWKS)
+        return httpx.Response(404)
+
+
+def _client(server: FakeOIDCServer):
+    return OAuth().register(
+        name="oidc",
+        client_id="client-id",
+        client_secret="client-secret",
+        server_metadata_url=METADATA_URL,
+        client_kwargs={"transport": server.transport},
+    )
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "oidc.json")
+
+
+async def test_start_warms_authlib_and_persists(cache_path):
+    server = FakeOIDCServer()
+    client = _client(server)
+    cache = OIDCMetadataCache(client, METADATA_URL, ttl=3600, cache_path=cache_path, transport=server.transport)
+
+    await cache.start()
+    try:
+        assert server.requests == 2
+        assert await client.load_server_metadata() is client.server_metadata
+        assert await client.fetch_jwk_set() == JWKS
+        assert server.requests == 2
+    finally:
+        await cache.stop()
+
+    with open(cache_path, encoding="utf-8") as f:
+        assert json.load(f)["metadata"] == METADATA
+
+
+async def test_fresh_disk_copy_is_used_without_fetching(cache_path):
+    warm = FakeOIDCServer()
+    await OIDCMetadataCache(_client(warm), METADATA_URL, cache_path=cache_path, transport=warm.transport).refresh()
+
+    server = FakeOIDCServer()
+    client = _client(server)
+    cache = OIDCMetadataCache(client, METADATA_URL, ttl=3600, cache_path=cache_path, transport=server.transport)
+    await cache.start()
+    try:
+        assert server.requests == 0
+        assert client.server_metadata["issuer"] == METADATA["issuer"]
+        assert await client.fetch_jwk_set() == JWKS
+        assert server.requests == 0
+    finally:
+        await cache.stop()
+
+
+async def test_stale_disk_copy_is_refetched(cache_path):
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"metadata": METADATA, "jwks": JWKS, "loaded_at": time.time() - 7200}, f)
+
+    server = FakeOIDCServer()
+    cache = OIDCMetadataCache(_client(server), METADATA_URL, ttl=3600, cache_path=cache_path, transport=server.transport)
+    await cache.start()
+    await cache.stop()
+
+    assert server.requests == 2
+    assert time.time() - cache.loaded_at < 60
+
+
+async def test_failed_refresh_keeps_the_previous_copy(cache_path, caplog):
+    server = FakeOIDCServer()
+    client = _client(server)
+    cache = OIDCMetadataCache(client, METADATA_URL, ttl=3600, cache_path=cache_path, transport=server.transport)
+    await cache.refresh()
+    loaded_at = cache.loaded_at
+
+    server.down = True
+    with pytest.raises(httpx.HTTPStatusError):
+        await cache.refresh()
+
+    assert cache.loaded_at == loaded_at
+    assert client.server_metadata["jwks"] == JWKS
+    with open(cache_path, encoding="utf-8") as f:
+        assert json.load(f)["loaded_at"] == loaded_at
+
+    # Warm-up against a provider that is down logs a warning and does not fail startup
+    cold = OIDCMetadataCache(_client(server), METADATA_URL, cache_path=None, transport=server.transport)
+    with caplog.at_level(logging.WARNING, logger="utils.auth_google_utils"):
+        await cold.start()
+    await cold.stop()
+    assert cold.loaded_at is None
+    assert "OAuth metadata warm-up failed" in caplog.text
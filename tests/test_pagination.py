@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from database import SessionLocal
+from main import app
+from models.users_models import User
+from utils.pagination_utils import NEXT_CURSOR_HEADER
+
+
+def test_user_listing_is_a_list_with_the_cursor_in_headers():
+    with TestClient(app) as client:
+        with SessionLocal() as db:
+            db.add_all(User(email=f"page-{i}@example.com") for i in range(5))
+            db.commit()
+        expected = {f"page-{i}@example.com" for i in range(5)}
+
+        seen, url, pages = [], "/users/?limit=2", 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert isinstance(response.json(), list)
+            seen.extend(user["email"] for user in response.json())
+            pages += 1
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                assert "link" not in response.headers
+                url = None
+            else:
+                assert response.headers["link"].endswith('; rel="next"')
+                url = f"/users/?limit=2&cursor={cursor}"
+
+        assert expected <= set(seen)
+        assert len(seen) == len(set(seen))
+        assert pages >= 3
+
+
+def test_invalid_cursor_is_rejected():
+    with TestClient(app) as client:
+        assert client.get("/users/?cursor=not-a-cursor").status_code == 400
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+import asyncio
+import uuid
+
+from fastapi import HTTPException
+
+from database import AsyncSessionLocal, SessionLocal, create_db_and_tables
+from models.token_models import TokenBlocklist, TokenType
+from models.users_models import User
+from services.revocation_cache import revocation_cache
+from services.revocation_channel import warm_revocation_cache
+from services.tokens_service import TokenPair, TokenService
+
+
+def _seed_user(email: str) -> None:
+    create_db_and_tables()
+    with SessionLocal() as db:
+        db.add(User(email=email))
+        db.commit()
+
+
+async def _rotate(refresh_token: str):
+    async with AsyncSessionLocal() as db:
+        try:
+            return await TokenService(db).rotate_refresh_token(refresh_token)
+        except HTTPException as exc:
+            return exc
+
+
+async def test_concurrent_rotations_of_one_token_succeed_once():
+    email = "rotate-race@example.com"
+    _seed_user(email)
+    async with AsyncSessionLocal() as db:
+        refresh_token = TokenService(db).create_refresh_token(data={"sub": email})
+
+    results = await asyncio.gather(*(_rotate(refresh_token) for _ in range(2)))
+
+    assert sum(isinstance(result, TokenPair) for result in results) == 1
+    [denied] = [result for result in results if isinstance(result, HTTPException)]
+    assert (denied.status_code, denied.detail) == (401, "Token revoked")
+
+
+async def test_replay_is_caught_by_the_table_without_the_cache():
+    email = "rotate-replay@example.com"
+    _seed_user(email)
+    async with AsyncSessionLocal() as db:
+        refresh_token = TokenService(db).create_refresh_token(data={"sub": email})
+
+    assert isinstance(await _rotate(refresh_token), TokenPair)
+    revocation_cache.invalidate()
+    replay = await _rotate(refresh_token)
+    assert isinstance(replay, HTTPException)
+    assert (replay.status_code, replay.detail) == (401, "Token revoked")
+
+
+async def test_blacklisting_a_row_the_cache_has_not_heard_of_is_a_no_op():
+    jti, expires_at = str(uuid.uuid4()), datetime(2100, 1, 1, tzinfo=timezone.utc)
+    create_db_and_tables()
+    warm_revocation_cache()
+    try:
+        # Committed by "another worker" whose notification has not arrived yet
+        with SessionLocal() as db:
+            db.add(TokenBlocklist(jti=jti, token_type="refresh", expires_at=expires_at, reason="logout"))
+            db.commit()
+        assert revocation_cache.lookup(jti) is False
+
+        async with AsyncSessionLocal() as db:
+            service = TokenService(db)
+            assert not await service.blacklist_token(
+                jti=jti, token_type=TokenType.REFRESH, user_id=None, expires_at=expires_at, reason="logout"
+            )
+            assert await service.is_blacklisted(jti)
+    finally:
+        revocation_cache.invalidate()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+from services.revocation_cache import BloomFilter, RevocationCache
+
+
+class FakeBlocklistSession:
+    """Stands in for ``db.query(jti, expires_at).filter(...).all()``."""
+
+    def __init__(self, rows, during_load=None):
+        self.rows = rows
+        self.during_load = during_load
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        if self.during_load is not None:
+            self.during_load()
+        return list(self.rows)
+
+
+def _future(minutes: int = 10) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(minutes=minutes)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_negative_answers_only_after_warm():
+    cache = RevocationCache(capacity=100)
+    assert cache.lookup("unknown") is None
+    cache.warm(FakeBlocklistSession([("revoked", _future())]))
+    assert cache.lookup("unknown") is False
+    assert cache.lookup("revoked") is True
+    cache.invalidate()
+    assert cache.lookup("unknown") is None
+
+
+def test_rebuild_recovers_a_saturated_filter():
+    cache = RevocationCache(capacity=10, lru_size=5)
+    cache.warm(FakeBlocklistSession([]))
+    for i in range(20):
+        cache.add(f"old-{i}", _future())
+    assert cache.stats()["filter_saturated"]
+    assert cache.lookup("unknown") is None
+
+    # The sweeper has since deleted the expired rows; only one is left
+    cache.rebuild(FakeBlocklistSession([("live", _future())]))
+    assert not cache.stats()["filter_saturated"]
+    assert cache.lookup("unknown") is False
+    assert cache.lookup("live") is True
+
+
+def test_rebuild_does_not_make_an_untrusted_filter_trusted():
+    cache = RevocationCache(capacity=100)
+    cache.rebuild(FakeBlocklistSession([]))
+    assert cache.lookup("unknown") is None
+
+
+def test_revocation_added_while_rebuilding_is_kept():
+    cache = RevocationCache(capacity=100, lru_size=1)
+    cache.warm(FakeBlocklistSession([]))
+    # Fill the LRU so the filter is the only place that still knows about "racing"
+    cache.rebuild(FakeBlocklistSession([], during_load=lambda: cache.add("racing", _future())))
+    cache.add("other", _future())
+    assert cache.lookup("racing") is not False
+
+
+def test_counters():
+    cache = RevocationCache(capacity=100)
+    cache.warm(FakeBlocklistSession([("revoked", _future())]))
+    cache.lookup("revoked")
+    cache.lookup("unknown")
+    stats = cache.stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (1, 1, 0)
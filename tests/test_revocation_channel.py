@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+import sys
+import types
+
+from database import AsyncSessionLocal
+from services.revocation_channel import LocalRevocationChannel, PostgresRevocationChannel, _encode
+
+EXPIRES_AT = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(hours=1)
+
+
+def _recording(channel):
+    events = []
+    channel.subscribe(
+        lambda jti, expires_at: events.append(("revoked", jti, expires_at)),
+        on_gap=lambda: events.append(("gap",)),
+        on_resync=lambda: events.append(("resync",)),
+    )
+    return events
+
+
+async def test_local_channel_delivers_after_commit_only():
+    channel = LocalRevocationChannel()
+    events = _recording(channel)
+
+    async with AsyncSessionLocal() as db:
+        await channel.publish(db, "committed", EXPIRES_AT)
+        assert events == []
+        await db.commit()
+        await channel.publish(db, "rolled-back", EXPIRES_AT)
+        await db.rollback()
+
+    assert events == [("revoked", "committed", EXPIRES_AT)]
+    assert channel.stats()["connected"] is False
+
+
+def _fake_psycopg(sessions):
+    """A psycopg stand-in whose n-th connection delivers ``sessions[n]`` then drops (or idles, if last)."""
+
+    class Notify:
+        def __init__(self, payload):
+            self.payload = payload
+
+    class Connection:
+        def __init__(self, payloads, last):
+            self.payloads, self.last = payloads, last
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, query):
+            pass
+
+        async def notifies(self):
+            for payload in self.payloads:
+                yield Notify(payload)
+            if self.last:
+                await asyncio.Event().wait()
+            raise ConnectionError("server closed the connection")
+
+    class AsyncConnection:
+        @staticmethod
+        async def connect(dsn, autocommit):
+            payloads = sessions.pop(0)
+            return Connection(payloads, last=not sessions)
+
+    class Composable:
+        def __init__(self, *_):
+            pass
+
+        def format(self, *_):
+            return self
+
+    psycopg = types.ModuleType("psycopg")
+    psycopg.AsyncConnection = AsyncConnection
+    psycopg.sql = types.ModuleType("psycopg.sql")
+    psycopg.sql.SQL = psycopg.sql.Identifier = Composable
+    return psycopg
+
+
+async def test_postgres_channel_resyncs_after_a_dropped_connection(monkeypatch):
+    psycopg = _fake_psycopg([[_encode("before", EXPIRES_AT), "not json"], [_encode("after", EXPIRES_AT)]])
+    monkeypatch.setitem(sys.modules, "psycopg", psycopg)
+    monkeypatch.setitem(sys.modules, "psycopg.sql", psycopg.sql)
+    channel = PostgresRevocationChannel("postgresql://fake", reconnect_seconds=0)
+    events = _recording(channel)
+
+    await channel.start()
+    try:
+        for _ in range(100):
+            if len(events) == 4:
+                break
+            await asyncio.sleep(0.01)
+        assert events == [
+            ("revoked", "before", EXPIRES_AT),
+            ("gap",),
+            ("resync",),
+            ("revoked", "after", EXPIRES_AT),
+        ]
+        assert channel.connected
+        assert channel.stats() == {
+            "published": 0,
+            "received": 2,
+            "malformed": 1,
+            "connected": True,
+            "reconnects": 1,
+        }
+    finally:
+        await channel.stop()
+    assert not channel.connected
@@ -0,0 +1,80 @@
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+
+from utils import smtp_transport
+from utils.smtp_transport import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Records connections; the server drops every connection listed in ``drop`` on its next send."""
+
+    instances: list["FakeSMTP"] = []
+    drop: set[int] = set()
+
+    def __init__(self, **options):
+        self.number = len(FakeSMTP.instances)
+        self.is_connected = False
+        self.sent: list[str] = []
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        pass
+
+    async def send_message(self, message):
+        if self.number in FakeSMTP.drop:
+            self.is_connected = False
+            raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+        self.sent.append(message["Subject"])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances, FakeSMTP.drop = [], set()
+    monkeypatch.setattr(smtp_transport.aiosmtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def _message(subject: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    return message
+
+
+async def test_connection_is_reused_across_sends(fake_smtp):
+    pool = SMTPConnectionPool("smtp.test", start_tls=False)
+    await pool.send(_message("one"))
+    await pool.send(_message("two"))
+
+    assert [conn.sent for conn in fake_smtp.instances] == [["one", "two"]]
+
+
+async def test_dropped_connection_is_reopened_once_and_the_message_retried(fake_smtp):
+    pool = SMTPConnectionPool("smtp.test", start_tls=False)
+    await pool.send(_message("one"))
+    fake_smtp.drop.add(0)
+    await pool.send_many([_message("two"), _message("three")])
+
+    assert [conn.sent for conn in fake_smtp.instances] == [["one"], ["two", "three"]]
+    assert not fake_smtp.instances[0].is_connected
+
+
+async def test_second_failure_is_raised_and_frees_the_slot(fake_smtp):
+    pool = SMTPConnectionPool("smtp.test", pool_size=1, start_tls=False)
+    fake_smtp.drop.update({0, 1})
+    with pytest.raises(aiosmtplib.SMTPServerDisconnected):
+        await pool.send(_message("lost"))
+
+    assert len(fake_smtp.instances) == 2
+    await pool.send(_message("next"))
+    assert fake_smtp.instances[2].sent == ["next"]
@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+import utils.sql_profiler as sql_profiler
+from main import app
+from utils.sql_profiler import statement_shape
+
+
+def test_header_is_ignored_unless_allowed():
+    assert not sql_profiler.SQL_PROFILE_ALLOW_HEADER
+    with TestClient(app) as client:
+        response = client.get("/", headers={"X-SQL-Profile": "1"})
+    assert "x-sql-profile" not in response.headers
+
+
+def test_header_enables_profiling_when_allowed(monkeypatch):
+    monkeypatch.setattr(sql_profiler, "SQL_PROFILE_ALLOW_HEADER", True)
+    with TestClient(app) as client:
+        assert "x-sql-profile" not in client.get("/").headers
+        response = client.get("/", headers={"X-SQL-Profile": "1"})
+    assert response.headers["x-sql-profile"].startswith("statements=")
+
+
+def test_statement_shape_folds_in_lists():
+    assert statement_shape("SELECT * FROM t\n WHERE id IN (?, ?, ?)") == statement_shape("SELECT * FROM t WHERE id IN (?)")
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+from database import SessionLocal, create_db_and_tables
+from models.code_validation_models import PhoneEmailVerificationCode
+from services.sweeper_service import ExpirySweeper
+
+
+def _code(email: str, expires_in: timedelta, used: bool) -> PhoneEmailVerificationCode:
+    now = datetime.now(timezone.utc)
+    return PhoneEmailVerificationCode(
+        email=email,
+        phone_number="+14155550199",
+        code_hash="0" * 64,
+        created_at=now,
+        expires_at=now + expires_in,
+        used_at=now if used else None,
+    )
+
+
+async def test_sweep_purges_expired_codes_in_batches():
+    create_db_and_tables()
+    with SessionLocal() as db:
+        db.add_all(_code(f"expired-{i}@sweep.test", timedelta(minutes=-1), used=i % 2 == 0) for i in range(5))
+        db.add(_code("active@sweep.test", timedelta(minutes=5), used=False))
+        db.add(_code("used@sweep.test", timedelta(minutes=5), used=True))
+        db.commit()
+
+    sweeper = ExpirySweeper(batch_size=2, pause_seconds=0, revocation_cache=None)
+    purged = await sweeper.sweep_once()
+
+    assert purged[PhoneEmailVerificationCode.__tablename__] >= 5
+    with SessionLocal() as db:
+        left = db.query(PhoneEmailVerificationCode.email).filter(PhoneEmailVerificationCode.email.like("%@sweep.test"))
+        assert sorted(email for (email,) in left) == ["active@sweep.test", "used@sweep.test"]
@@ -0,0 +1,55 @@
+import pytest
+
+from database import AsyncSessionLocal, create_db_and_tables
+from models.users_models import User
+from services import users_services
+from services.users_services import PHONE_EMAIL_CODE_MAX_ATTEMPTS, UserService, verification_code_key
+
+INVALID = {"error": "Invalid or expired code"}
+
+
+def _wrong(code: str) -> str:
+    return f"{(int(code) + 1) % 1_000_000:06d}"
+
+
+async def _request_code(email: str, phone: str) -> str:
+    create_db_and_tables()
+    async with AsyncSessionLocal() as db:
+        return await UserService(db).get_phone_number_verification_email_code(phone, email)
+
+
+async def _verify(email: str, phone: str, code: str):
+    async with AsyncSessionLocal() as db:
+        return await UserService(db).validate_phone_number_verification_code(email, phone, code)
+
+
+async def test_code_is_locked_after_max_wrong_attempts():
+    email, phone = "attempts@example.com", "+14155550101"
+    code = await _request_code(email, phone)
+
+    for _ in range(PHONE_EMAIL_CODE_MAX_ATTEMPTS):
+        assert await _verify(email, phone, _wrong(code)) == INVALID
+
+    assert await _verify(email, phone, code) == INVALID
+
+
+async def test_code_below_the_cap_is_accepted_once():
+    email, phone = "single-use@example.com", "+14155550102"
+    code = await _request_code(email, phone)
+
+    for _ in range(PHONE_EMAIL_CODE_MAX_ATTEMPTS - 1):
+        assert await _verify(email, phone, _wrong(code)) == INVALID
+
+    user = await _verify(email, phone, code)
+    assert isinstance(user, User) and user.email == email
+    assert await _verify(email, phone, code) == INVALID
+
+
+def test_missing_key_fails_when_used_not_at_import(monkeypatch):
+    monkeypatch.setattr(users_services.settings, "verification_code_hmac_key", None)
+    monkeypatch.setattr(users_services.settings, "secret_key", None)
+    with pytest.raises(RuntimeError, match="VERIFICATION_CODE_HMAC_KEY"):
+        verification_code_key()
+
+    monkeypatch.setattr(users_services.settings, "verification_code_hmac_key", "dedicated")
+    assert verification_code_key() == b"dedicated"
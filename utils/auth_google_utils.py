@@ -1,20 +1,172 @@
 from starlette.requests import Request
 from authlib.integrations.starlette_client import OAuth
+from functools import lru_cache
+from typing import Optional
+import asyncio
+import json
+import logging
 import os
+import time
 
-oauth = OAuth()
-oauth.register(
-    name='google',
-    client_id=os.getenv('GOOGLE_CLIENT_ID'),
-    client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    },
+import httpx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+GOOGLE_METADATA_URL = settings.google_metadata_url
+OAUTH_METADATA_TTL_SECONDS = settings.oauth_metadata_ttl_seconds
+OAUTH_METADATA_CACHE_PATH = settings.oauth_metadata_cache_path
+# Without credentials Google login cannot work, so nothing is fetched ahead of time
+GOOGLE_OAUTH_CONFIGURED = bool(settings.google_client_id and settings.google_client_secret)
+
+
+class SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """Pooled transport shared by the short-lived clients Authlib creates per call.
+
+    Authlib closes its client after every request; closing must not tear down
+    the shared connection pool, so ``aclose`` is a no-op and :meth:`close_pool`
+    releases it on shutdown.
+    """
+
+    def __init__(self, **kwargs):
+        self._transport = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+    async def close_pool(self) -> None:
+        await self._transport.aclose()
+
+
+oauth_transport = SharedAsyncTransport(
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    retries=1,
 )
 
+oauth = OAuth()
+
+
+@lru_cache
+def get_google_client():
+    """Register the Google client on first use (the app lifespan does it at startup)."""
+    return oauth.register(
+        name='google',
+        client_id=settings.google_client_id,
+        client_secret=settings.google_client_secret,
+        server_metadata_url=GOOGLE_METADATA_URL,
+        client_kwargs={
+            'scope': 'openid email profile',
+            'transport': oauth_transport,
+        },
+    )
+
+
+class OIDCMetadataCache:
+    """Keeps provider discovery metadata and JWKS warm for an Authlib client.
+
+    Authlib fetches both lazily on the first OAuth request of each worker.
+    :meth:`start` loads them at startup (from disk when a fresh copy exists),
+    then a background task refreshes them every ``ttl`` seconds. A failed
+    refresh keeps serving the previous copy.
+    """
+
+    def __init__(
+        self,
+        client,
+        metadata_url: str,
+        *,
+        ttl: float = OAUTH_METADATA_TTL_SECONDS,
+        cache_path: Optional[str] = OAUTH_METADATA_CACHE_PATH,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.client = client
+        self.metadata_url = metadata_url
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.transport = transport
+        self.loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _apply(self, metadata: dict, jwks: dict, loaded_at: float) -> None:
+        # '_loaded_at' and 'jwks' are the keys Authlib checks before fetching itself
+        self.client.server_metadata.update({**metadata, 'jwks': jwks, '_loaded_at': loaded_at})
+        self.loaded_at = loaded_at
+
+    async def refresh(self) -> None:
+        async with httpx.AsyncClient(transport=self.transport, timeout=10.0) as http:
+            response = await http.get(self.metadata_url)
+            response.raise_for_status()
+            metadata = response.json()
+            response = await http.get(metadata['jwks_uri'])
+            response.raise_for_status()
+            jwks = response.json()
+        self._apply(metadata, jwks, time.time())
+        self._persist(metadata, jwks)
+
+    def _persist(self, metadata: dict, jwks: dict) -> None:
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': metadata, 'jwks': jwks, 'loaded_at': self.loaded_at}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def load_from_disk(self) -> bool:
+        """Apply the persisted copy; returns True when it is still within the TTL."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            self._apply(cached['metadata'], cached['jwks'], cached['loaded_at'])
+        except (OSError, ValueError, KeyError):
+            logger.warning("Ignoring unreadable OAuth metadata cache at %s", self.cache_path)
+            return False
+        return time.time() - self.loaded_at < self.ttl
+
+    async def _refresh_forever(self) -> None:
+        delay = self.ttl if self.loaded_at is None else max(self.loaded_at + self.ttl - time.time(), 1.0)
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = self.ttl
+            except Exception as e:
+                logger.warning("OAuth metadata refresh failed (%r); keeping the cached copy", e)
+                delay = min(60.0, self.ttl)
+
+    async def start(self) -> None:
+        if not self.load_from_disk():
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Authlib still falls back to its own lazy fetch on the first request
+                logger.warning("OAuth metadata warm-up failed (%r)", e)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+@lru_cache
+def get_google_metadata_cache() -> OIDCMetadataCache:
+    return OIDCMetadataCache(get_google_client(), GOOGLE_METADATA_URL, transport=oauth_transport)
+
 async def oauth_google_authorize_redirect(request: Request, redirect_uri: str):
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_google_client().authorize_redirect(request, redirect_uri)
 
 async def oauth_google_authorize_access_token(request: Request):
-    return await oauth.google.authorize_access_token(request)
+    return await get_google_client().authorize_access_token(request)
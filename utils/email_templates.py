@@ -0,0 +1,70 @@
+from typing import Optional
+import os
+
+from jinja2 import Environment, FileSystemLoader, Template, TemplateNotFound, select_autoescape
+
+from config import get_settings
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+settings = get_settings()
+EMAIL_TEMPLATES_DIR = settings.email_templates_dir or os.path.join(BASE_DIR, "static", "template")
+EMAIL_TEMPLATES_AUTO_RELOAD = settings.email_templates_auto_reload
+
+# Used when a template file is missing
+FALLBACK_TEMPLATES = {
+    "magic-link.html": (
+        "<html><body>"
+        "<p>Click the button or link to continue:</p>"
+        "<p><a href=\"{{ link }}\" target=\"_blank\" rel=\"noopener noreferrer\">Enter</a></p>"
+        "<p>{{ link }}</p>"
+        "</body></html>"
+    ),
+    "phone-code.html": "<html><body><p>Your verification token is: {{ code }}</p></body></html>",
+}
+
+
+class EmailTemplateRegistry:
+    """Compiles every email template once and renders from the compiled objects.
+
+    Jinja keeps the static parts of a compiled template as constants, so a send
+    only pays for the variable substitutions and never touches the disk. With
+    ``auto_reload`` (dev only), templates are re-read when their file changes.
+    """
+
+    def __init__(self, directory: str = EMAIL_TEMPLATES_DIR, auto_reload: bool = EMAIL_TEMPLATES_AUTO_RELOAD):
+        self.auto_reload = auto_reload
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html", "htm", "xml"], default_for_string=True),
+            auto_reload=auto_reload,
+            cache_size=-1,
+        )
+        self._templates: dict[str, Template] = {}
+        self.load_all()
+
+    def load_all(self) -> None:
+        templates = {name: self.env.from_string(source) for name, source in FALLBACK_TEMPLATES.items()}
+        for name in self.env.list_templates(extensions=["html", "txt"]):
+            try:
+                templates[name] = self.env.get_template(name)
+            except TemplateNotFound:
+                continue
+        self._templates = templates
+
+    def get(self, name: str) -> Optional[Template]:
+        if self.auto_reload:
+            try:
+                return self.env.get_template(name)
+            except TemplateNotFound:
+                pass
+        return self._templates.get(name)
+
+    def render(self, name: str, **context) -> str:
+        template = self.get(name)
+        if template is None:
+            raise TemplateNotFound(name)
+        return template.render(**context)
+
+
+email_templates = EmailTemplateRegistry()
@@ -1,25 +1,53 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import ssl
-import os
-import certifi
+import time
+
+from utils.smtp_transport import SMTPConnectionPool
+from utils.email_templates import email_templates
+from utils.metrics import smtp_send_seconds
+from config import get_settings
 
 
 email_router = APIRouter(prefix="/auth/email")
 
 # Email settings (example with Gmail SMTP)
-SMTP_SERVER = os.getenv("SMTP_SERVER")
-SMTP_PORT = os.getenv("SMTP_PORT")
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
-SMTP_REPLY_TO = os.getenv("SMTP_REPLY_TO")
-EMAIL_TOKEN_EXPIRE_MINUTES = int(os.getenv("EMAIL_TOKEN_EXPIRE_MINUTES"))
-URL = os.getenv("URL")
-
-def send_verification_email(email: str, token: str):
+settings = get_settings()
+
+SMTP_SERVER = settings.smtp_server
+SMTP_PORT = settings.smtp_port
+SMTP_USER = settings.smtp_user
+SMTP_PASSWORD = settings.smtp_password
+SMTP_REPLY_TO = settings.smtp_reply_to
+EMAIL_TOKEN_EXPIRE_MINUTES = settings.email_token_expire_minutes
+URL = settings.url
+SMTP_POOL_SIZE = settings.smtp_pool_size
+SMTP_USE_TLS = settings.smtp_use_tls
+SMTP_START_TLS = settings.smtp_start_tls
+
+# Shared transport: connections are authenticated once and reused across sends
+smtp_pool = SMTPConnectionPool(
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_USER,
+    SMTP_PASSWORD,
+    pool_size=SMTP_POOL_SIZE,
+    use_tls=SMTP_USE_TLS,
+    start_tls=SMTP_START_TLS,
+)
+
+
+async def _send_timed(message, template: str):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        await smtp_pool.send(message)
+        outcome = "ok"
+    finally:
+        smtp_send_seconds.observe(time.perf_counter() - started, template, outcome)
+
+async def send_verification_email(email: str, token: str):
     try:
         # Create the email content (plain + HTML alternative)
         message = MIMEMultipart("alternative")
@@ -33,41 +61,19 @@ def send_verification_email(email: str, token: str):
         # Plain text fallback
         plain_text_body = verification_link
 
-        # HTML body from template with link substitution
-        try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            template_path = os.path.join(base_dir, "static", "template", "magic-link.html")
-            with open(template_path, "r", encoding="utf-8") as f:
-                html_template = f.read()
-            html_body = html_template.replace("{{ link }}", verification_link)
-        except Exception:
-            # Fallback minimal HTML if template missing/unreadable
-            html_body = (
-                f"<html><body>"
-                f"<p>Click the button or link to continue:</p>"
-                f"<p><a href=\"{verification_link}\" target=\"_blank\" rel=\"noopener noreferrer\">Enter</a></p>"
-                f"<p>{verification_link}</p>"
-                f"</body></html>"
-            )
+        # HTML body from the precompiled template
+        html_body = email_templates.render("magic-link.html", link=verification_link)
 
         message.attach(MIMEText(plain_text_body, "plain"))
         message.attach(MIMEText(html_body, "html"))
 
-        # Connect to SMTP server
-        context = ssl.create_default_context(cafile=certifi.where())
-        server = smtplib.SMTP(SMTP_SERVER, int(SMTP_PORT) if SMTP_PORT else 587)
-        server.starttls(context=context)
-        server.login(SMTP_USER, SMTP_PASSWORD)
-
-        # Send email
-        server.sendmail(SMTP_USER, email, message.as_string())
-        server.quit()
+        await _send_timed(message, "magic-link")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Email failed: {str(e)}")
 
 
-def send_phone_number_verification_email_utils(email: str, token: str):
+async def send_phone_number_verification_email_utils(email: str, token: str):
     try:
         # Create the email content (plain + HTML alternative)
         message = MIMEMultipart("alternative")
@@ -80,24 +86,12 @@ def send_phone_number_verification_email_utils(email: str, token: str):
 
         plain_text_body = "Your verification token is: " + verification_token
 
-        html_body = (
-            f"<html><body>"
-            f"<p>Your verification token is: {verification_token}</p>"
-            f"</body></html>"
-        )
+        html_body = email_templates.render("phone-code.html", code=verification_token)
 
         message.attach(MIMEText(plain_text_body, "plain"))
         message.attach(MIMEText(html_body, "html"))
 
-        # Connect to SMTP server
-        context = ssl.create_default_context(cafile=certifi.where())
-        server = smtplib.SMTP(SMTP_SERVER, int(SMTP_PORT) if SMTP_PORT else 587)
-        server.starttls(context=context)
-        server.login(SMTP_USER, SMTP_PASSWORD)
-
-        # Send email
-        server.sendmail(SMTP_USER, email, message.as_string())
-        server.quit()
+        await _send_timed(message, "phone-code")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Email failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,226 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Iterable, Optional
+import math
+import time
+
+from config import get_settings
+
+METRICS_ENABLED = get_settings().metrics_enabled
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond cache hits up to slow SMTP sends
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple) -> str:
+    if not labelnames:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram; ``observe`` is a bisect plus three additions."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        names = self.labelnames + ("le",)
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format.
+
+    Besides counters and histograms, collectors can expose existing ``stats()``
+    dictionaries as gauges at scrape time, so hot paths pay nothing for them.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._collectors: list[tuple[str, str, Callable[[], dict], tuple]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, documentation: str, stats: Callable[[], dict], labelnames: tuple = ()) -> None:
+        """Expose every numeric value of ``stats()`` as gauge ``<prefix>_<key>``.
+
+        Keys of nested dicts become label values, named by ``labelnames`` per level.
+        """
+        self._collectors.append((prefix, documentation, stats, tuple(labelnames)))
+
+    @staticmethod
+    def _flatten(stats: dict, labels: tuple = ()) -> Iterable[tuple[str, tuple, float]]:
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                yield from MetricsRegistry._flatten(value, labels + (key,))
+            elif isinstance(value, (bool, int, float)):
+                yield key, labels, float(value)
+
+    def _render_collector(self, prefix: str, documentation: str, stats: Callable[[], dict], labelnames: tuple) -> Iterable[str]:
+        series: dict[str, list[tuple[tuple, float]]] = {}
+        for key, labels, value in self._flatten(stats()):
+            series.setdefault(key, []).append((labels, value))
+        for key, samples in series.items():
+            name = f"{prefix}_{key}"
+            yield f"# HELP {name} {documentation}"
+            yield f"# TYPE {name} gauge"
+            for labels, value in samples:
+                yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(self._render_collector(*collector))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# ==================== INSTRUMENTS ====================
+
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+db_statement_seconds = metrics.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time.", ("engine", "operation")
+)
+http_request_db_statements = metrics.histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request.", ("route",), COUNT_BUCKETS
+)
+http_request_db_seconds = metrics.histogram(
+    "http_request_db_duration_seconds", "Total SQL time per HTTP request.", ("route",)
+)
+jwt_operation_seconds = metrics.histogram(
+    "jwt_operation_duration_seconds", "JWT encode/decode time in TokenService.", ("operation",)
+)
+smtp_send_seconds = metrics.histogram(
+    "smtp_send_duration_seconds", "SMTP send latency by template and outcome.", ("template", "outcome")
+)
+
+# [statement count, seconds] for the request being served, filled in by the engine events
+request_db_usage: ContextVar[Optional[list]] = ContextVar("request_db_usage", default=None)
+
+
+def record_db_statement(engine: str, operation: str, seconds: float) -> None:
+    db_statement_seconds.observe(seconds, engine, operation)
+    usage = request_db_usage.get()
+    if usage is not None:
+        usage[0] += 1
+        usage[1] += seconds
+
+
+# ==================== ASGI MIDDLEWARE ====================
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: one timer and one histogram update per request.
+
+    Requests are labelled with the matched route template (``/users/{user_id}``),
+    never the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, enabled: bool = METRICS_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        usage = [0, 0.0]
+        token = request_db_usage.set(usage)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_db_usage.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "<unmatched>"
+            http_request_seconds.observe(elapsed, scope["method"], route, status_code)
+            http_request_db_statements.observe(usage[0], route)
+            http_request_db_seconds.observe(usage[1], route)
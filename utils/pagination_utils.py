@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import base64
+
+from fastapi import HTTPException, Request, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Opaque keyset cursor for ``(created_at, id)`` ordering."""
+    raw = f"{created_at.isoformat()}|{id.hex}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, UUID]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id_hex = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(hex=id_hex)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def set_next_page_headers(request: Request, response: Response, next_after: Optional[tuple[datetime, UUID]]) -> None:
+    """Advertise the next page in headers, so listing bodies stay plain JSON arrays.
+
+    ``X-Next-Cursor`` carries the opaque cursor and ``Link: <...>; rel="next"``
+    the full URL; both are absent on the last page.
+    """
+    if next_after is None:
+        return
+    cursor = encode_cursor(*next_after)
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    response.headers["Link"] = f'<{request.url.include_query_params(cursor=cursor)}>; rel="next"'
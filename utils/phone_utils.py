@@ -0,0 +1,43 @@
+import re
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from config import get_settings
+
+# Country calling code assumed for numbers given without one (e.g. "54"); unset = require it
+DEFAULT_PHONE_COUNTRY_CODE = get_settings().default_phone_country_code.lstrip("+")
+
+_SEPARATORS = re.compile(r"[\s\-.()/]")
+_E164 = re.compile(r"^\+[1-9]\d{7,14}$")
+
+
+def to_e164(phone_number: str, default_country_code: str = DEFAULT_PHONE_COUNTRY_CODE) -> Optional[str]:
+    """``phone_number`` as E.164 (``+<country><number>``), or ``None`` if it cannot be one.
+
+    Without a ``+``/``00`` prefix the number is only accepted when a default
+    country code is configured.
+    """
+    phone = _SEPARATORS.sub("", phone_number or "")
+    if phone.startswith("00"):
+        phone = "+" + phone[2:]
+    elif not phone.startswith("+"):
+        if not default_country_code:
+            return None
+        phone = "+" + default_country_code + phone.lstrip("0")
+    return phone if _E164.match(phone) else None
+
+
+def normalize_phone_number(phone_number: str) -> str:
+    """Normalize a phone number to E.164, or reject it with a 422.
+
+    Every read and write goes through here so the same number always hits the
+    ``user_phones.phone`` unique index.
+    """
+    phone = to_e164(phone_number)
+    if phone is None:
+        detail = f"Invalid phone number: {phone_number}"
+        if not DEFAULT_PHONE_COUNTRY_CODE:
+            detail += " (include the country code, e.g. +54...)"
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+    return phone
@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+import math
+import re
+import time
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import case, select
+
+from config import get_settings
+from database import async_engine, dialect_insert
+from models.rate_limit_models import RateLimitBucket
+
+settings = get_settings()
+
+RATE_LIMIT_ENABLED = settings.rate_limit_enabled
+RATE_LIMIT_BACKEND = settings.rate_limit_backend
+RATE_LIMIT_MAX_KEYS = settings.rate_limit_max_keys
+RATE_LIMIT_TRUST_FORWARDED_FOR = settings.rate_limit_trust_forwarded_for
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_SPEC = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``capacity`` requests in a burst, refilled evenly over ``period_seconds``."""
+    capacity: int
+    period_seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period_seconds
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse ``"5/minute"``, ``"20/hour"`` or ``"10/15minutes"``."""
+        match = _SPEC.match(spec)
+        if not match:
+            raise ValueError(f"Invalid rate limit {spec!r} (expected e.g. '5/minute' or '10/15minutes')")
+        count, multiplier, unit = match.groups()
+        return cls(int(count), int(multiplier or 1) * _PERIODS[unit])
+
+
+LOGIN_PER_EMAIL = RateLimit.parse(settings.rate_limit_login_per_email)
+LOGIN_PER_IP = RateLimit.parse(settings.rate_limit_login_per_ip)
+PHONE_CODE_PER_PHONE = RateLimit.parse(settings.rate_limit_phone_code_per_phone)
+PHONE_CODE_PER_EMAIL = RateLimit.parse(settings.rate_limit_phone_code_per_email)
+PHONE_CODE_PER_IP = RateLimit.parse(settings.rate_limit_phone_code_per_ip)
+
+
+# ==================== BACKENDS ====================
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens from the bucket. Returns 0 when allowed, else seconds until it would be."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Token buckets in a bounded LRU dict: one lookup and one write per check.
+
+    Evicting a bucket only forgets its debt, and the least recently used
+    bucket is the one most likely to have refilled already.
+    """
+
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        now = self._clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Token buckets in ``rate_limit_buckets``, shared by every worker.
+
+    Refill, check and take are one ``INSERT ... ON CONFLICT DO UPDATE ...
+    WHERE refilled >= cost RETURNING`` on the primary key, so concurrent
+    workers cannot both spend the last token. Only a denied request reads the
+    row again, to compute ``Retry-After``.
+    """
+
+    def __init__(self, engine=async_engine, clock=time.time):
+        self.engine = engine
+        self._clock = clock
+
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        now = self._clock()
+        bucket = RateLimitBucket.__table__.c
+        refilled = bucket.tokens + (now - bucket.updated_at) * limit.rate
+        refilled = case((refilled > limit.capacity, float(limit.capacity)), else_=refilled)
+        stmt = dialect_insert(self.engine)(RateLimitBucket).values(
+            id=key,
+            tokens=limit.capacity - cost,
+            updated_at=now,
+            full_at=now + cost / limit.rate,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[bucket.id],
+            set_={
+                "tokens": refilled - cost,
+                "updated_at": now,
+                "full_at": now + (limit.capacity - (refilled - cost)) / limit.rate,
+            },
+            where=refilled >= cost,
+        ).returning(bucket.tokens)
+
+        async with self.engine.begin() as conn:
+            if (await conn.execute(stmt)).first() is not None:
+                return 0.0
+            tokens = (await conn.execute(select(refilled).where(bucket.id == key))).scalar_one()
+        return max((cost - tokens) / limit.rate, 0.001)
+
+
+def _backend_from_env() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND == "database":
+        return DatabaseRateLimitBackend()
+    if RATE_LIMIT_BACKEND == "memory":
+        return InMemoryRateLimitBackend()
+    raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND {RATE_LIMIT_BACKEND!r} (expected memory or database)")
+
+
+# ==================== LIMITER ====================
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.rejected = 0
+
+    async def check(self, *buckets: tuple[str, RateLimit]) -> None:
+        """Take a token from each bucket in order; raise 429 with ``Retry-After`` at the first empty one.
+
+        Later buckets are left untouched by a denied request, so a flood stopped
+        by the per-IP bucket cannot drain a victim's per-email or per-phone one.
+        """
+        if not self.enabled:
+            return
+        for key, limit in buckets:
+            retry_after = await self.backend.take(key, limit)
+            if retry_after > 0:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+rate_limiter = RateLimiter(_backend_from_env(), enabled=RATE_LIMIT_ENABLED)
@@ -0,0 +1,129 @@
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import Iterable, Optional
+import asyncio
+import ssl
+import time
+
+import aiosmtplib
+import certifi
+
+
+@dataclass
+class _PooledConnection:
+    client: aiosmtplib.SMTP
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SMTPConnectionPool:
+    """Small pool of authenticated ``aiosmtplib`` connections.
+
+    Connections are opened lazily, reused for many messages and transparently
+    reopened when the server drops them or they sit idle too long. The TLS
+    context is built once per pool instead of once per message.
+
+    Point it at a local stand-in server (e.g. ``aiosmtpd``) with
+    ``start_tls=False`` and no credentials.
+    """
+
+    def __init__(
+        self,
+        hostname: Optional[str],
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        *,
+        pool_size: int = 2,
+        use_tls: bool = False,
+        start_tls: bool = True,
+        timeout: float = 30.0,
+        idle_timeout: float = 60.0,
+        max_messages_per_connection: int = 100,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.pool_size = pool_size
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self._tls_context = ssl.create_default_context(cafile=certifi.where())
+        self._idle: Optional[asyncio.LifoQueue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _ensure_pool(self) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+            self._idle = asyncio.LifoQueue()
+
+    async def _connect(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls and not self.use_tls,
+            tls_context=self._tls_context,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        return _PooledConnection(client)
+
+    @staticmethod
+    async def _discard(conn: _PooledConnection) -> None:
+        client = conn.client
+        try:
+            if client.is_connected:
+                await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+    async def _acquire(self) -> _PooledConnection:
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            fresh = time.monotonic() - conn.last_used < self.idle_timeout
+            if conn.client.is_connected and fresh:
+                return conn
+            await self._discard(conn)
+        return await self._connect()
+
+    async def _release(self, conn: _PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        if conn.sent >= self.max_messages_per_connection:
+            await self._discard(conn)
+        else:
+            self._idle.put_nowait(conn)
+
+    async def send_many(self, messages: Iterable[Message]) -> None:
+        """Send messages back to back over a single pooled connection."""
+        self._ensure_pool()
+        async with self._slots:
+            conn = await self._acquire()
+            try:
+                for message in messages:
+                    try:
+                        await conn.client.send_message(message)
+                    except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError):
+                        # Server dropped a reused connection: reconnect once and retry
+                        conn.client.close()
+                        conn = await self._connect()
+                        await conn.client.send_message(message)
+                    conn.sent += 1
+            except BaseException:
+                await self._discard(conn)
+                raise
+            await self._release(conn)
+
+    async def send(self, message: Message) -> None:
+        await self.send_many([message])
+
+    async def close(self) -> None:
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
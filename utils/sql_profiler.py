@@ -0,0 +1,137 @@
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+import json
+import logging
+import re
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+# Profile every request, or only those sent with "X-SQL-Profile: 1" when the header is allowed (off by default)
+SQL_PROFILE = settings.sql_profile
+SQL_PROFILE_ALLOW_HEADER = settings.sql_profile_allow_header
+SQL_PROFILE_SLOW_MS = settings.sql_profile_slow_ms
+# The same statement shape this many times in one request is reported as a likely N+1
+SQL_PROFILE_REPEAT_THRESHOLD = settings.sql_profile_repeat_threshold
+SQL_PROFILE_AVAILABLE = SQL_PROFILE or SQL_PROFILE_ALLOW_HEADER
+
+PROFILE_HEADER = "x-sql-profile"
+_STATEMENT_PREVIEW_CHARS = 200
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists differ only in their number of placeholders
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace and IN-list lengths normalized; parameters are already placeholders."""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@dataclass
+class SQLProfile:
+    statements: list[tuple[str, float]] = field(default_factory=list)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements.append((statement, seconds))
+
+    def summary(self) -> dict:
+        shapes = Counter(statement_shape(statement) for statement, _ in self.statements)
+        repeated = [
+            {"count": count, "statement": shape[:_STATEMENT_PREVIEW_CHARS]}
+            for shape, count in shapes.most_common()
+            if count >= SQL_PROFILE_REPEAT_THRESHOLD
+        ]
+        slow = [
+            {"ms": round(seconds * 1000, 2), "statement": statement_shape(statement)[:_STATEMENT_PREVIEW_CHARS]}
+            for statement, seconds in self.statements
+            if seconds * 1000 >= SQL_PROFILE_SLOW_MS
+        ]
+        return {
+            "statements": len(self.statements),
+            "distinct": len(shapes),
+            "total_ms": round(sum(seconds for _, seconds in self.statements) * 1000, 2),
+            "repeated": repeated,
+            "slow": slow,
+        }
+
+
+current_sql_profile: ContextVar[Optional[SQLProfile]] = ContextVar("current_sql_profile", default=None)
+
+
+def record_profiled_statement(statement: str, seconds: float) -> None:
+    profile = current_sql_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+
+
+def _header_value(summary: dict) -> str:
+    return (
+        f"statements={summary['statements']}; distinct={summary['distinct']}; total_ms={summary['total_ms']}; "
+        f"repeated={len(summary['repeated'])}; slow={len(summary['slow'])}"
+    )
+
+
+class SQLProfilerMiddleware:
+    """Opt-in, request-scoped SQL profile (``SQL_PROFILE=true``, or ``X-SQL-Profile: 1`` with ``SQL_PROFILE_ALLOW_HEADER=true``).
+
+    The summary goes into an ``X-SQL-Profile`` response header and one JSON
+    log line (WARNING when it found repeated shapes or slow statements).
+    Statements run after the headers are sent (streaming bodies, background
+    tasks) only appear in the log line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        if SQL_PROFILE:
+            return True
+        if not SQL_PROFILE_ALLOW_HEADER:
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER.encode():
+                return value.strip().lower() in (b"1", b"true", b"yes")
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = SQLProfile()
+        token = current_sql_profile.set(profile)
+        status_code = 500
+
+        async def send_with_profile(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_HEADER.encode(), _header_value(profile.summary()).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            current_sql_profile.reset(token)
+            summary = profile.summary()
+            route = getattr(scope.get("route"), "path", None)
+            logger.log(
+                logging.WARNING if summary["repeated"] or summary["slow"] else logging.INFO,
+                "sql_profile %s",
+                json.dumps({
+                    "event": "sql_profile",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    **summary,
+                }),
+            )